@@ -3,5 +3,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "touragency.settings")
+# Under ASGI the read-only views are served by their async versions, see tours/async_views.py.
+os.environ.setdefault("TOURAGENCY_URLCONF", "touragency.asgi_urls")
 
 application = get_asgi_application()
@@ -0,0 +1,123 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = "pin_primary"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS", "TRACE"}
+# Only the tours data may be read from a replica; sessions and auth always come from the primary.
+REPLICA_APPS = {"tours"}
+
+_pinned: ContextVar[bool] = ContextVar("pinned_to_primary", default=False)
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def use_primary():
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def _render(response) -> bool:
+    return callable(getattr(response, "render", None)) and not getattr(response, "is_rendered", True)
+
+
+def replica_reads(view):
+    # Marks a read-only view (catalog, detail, sales report, admin changelist) whose tours queries
+    # may go to a replica. The template is rendered inside, since lazy querysets run there.
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method not in SAFE_METHODS:
+                return await view(request, *args, **kwargs)
+            token = _replica_reads.set(True)
+            try:
+                response = await view(request, *args, **kwargs)
+                if _render(response):
+                    await sync_to_async(response.render)()
+                return response
+            finally:
+                _replica_reads.reset(token)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return view(request, *args, **kwargs)
+        token = _replica_reads.set(True)
+        try:
+            response = view(request, *args, **kwargs)
+            if _render(response):
+                response.render()
+            return response
+        finally:
+            _replica_reads.reset(token)
+
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or not _replica_reads.get()
+            or _pinned.get()
+            or model._meta.app_label not in REPLICA_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class PrimaryPinMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _should_pin(self, request) -> bool:
+        return request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES
+
+    def _finish(self, request, response, token):
+        _pinned.reset(token)
+        if request.method not in SAFE_METHODS:
+            # Replicas may lag: keep the next few requests (e.g. the redirect after POST) on the primary.
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite="Lax"
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _pinned.set(self._should_pin(request))
+        return self._finish(request, self.get_response(request), token)
+
+    async def __acall__(self, request):
+        token = _pinned.set(self._should_pin(request))
+        return self._finish(request, await self.get_response(request), token)
@@ -0,0 +1,220 @@
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.template.backends.django import DjangoTemplates
+
+# Per-request profile: SQL count and time from an execute wrapper installed on every
+# connection, template time from the ProfilingDjangoTemplates backend. Only sampled
+# requests (PROFILING_SAMPLE_RATE) pay for it. Metrics are kept per process, so each
+# worker exposes its own histograms.
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNRESOLVED = "<unresolved>"
+
+
+@dataclass
+class RequestProfile:
+    queries: int = 0
+    db: float = 0.0
+    template: float = 0.0
+
+
+_profile: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries += 1
+        profile.db += time.perf_counter() - started
+
+
+def _install_wrapper(sender=None, connection=None, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class ProfiledTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        profile = _profile.get()
+        if profile is None:
+            return self.template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            profile.template += time.perf_counter() - started
+
+
+class ProfilingDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return ProfiledTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return ProfiledTemplate(super().get_template(template_name))
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.duration = Histogram()
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.response_bytes = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views: dict[tuple[str, str], ViewMetrics] = defaultdict(ViewMetrics)
+
+    def observe(self, view: str, method: str, duration: float, profile: RequestProfile, size: int) -> None:
+        with self._lock:
+            metrics = self._views[(view, method)]
+            metrics.duration.observe(duration)
+            metrics.queries += profile.queries
+            metrics.db += profile.db
+            metrics.template += profile.template
+            metrics.response_bytes += size
+
+    def render(self) -> str:
+        lines = [
+            "# HELP touragency_request_duration_seconds Sampled request latency per view.",
+            "# TYPE touragency_request_duration_seconds histogram",
+        ]
+        totals = []
+        with self._lock:
+            for (view, method), metrics in sorted(self._views.items()):
+                labels = f'view="{_escape(view)}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip((*BUCKETS, "+Inf"), metrics.duration.counts):
+                    cumulative += count
+                    lines.append(f'touragency_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"touragency_request_duration_seconds_sum{{{labels}}} {metrics.duration.sum:.6f}")
+                lines.append(f"touragency_request_duration_seconds_count{{{labels}}} {cumulative}")
+                totals.append((labels, metrics))
+        for name, kind, help_text, attr in (
+            ("touragency_db_queries_total", "counter", "SQL queries issued by sampled requests.", "queries"),
+            ("touragency_db_seconds_total", "counter", "Time spent in SQL by sampled requests.", "db"),
+            ("touragency_template_seconds_total", "counter", "Template rendering time.", "template"),
+            ("touragency_response_bytes_total", "counter", "Response body bytes.", "response_bytes"),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            lines += [f"{name}{{{labels}}} {getattr(metrics, attr)}" for labels, metrics in totals]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+registry = MetricsRegistry()
+
+
+def _response_size(response) -> int:
+    if getattr(response, "streaming", False):
+        return int(response.get("Content-Length") or 0)
+    return len(response.content)
+
+
+def _server_timing(profile: RequestProfile, total: float, size: int) -> str:
+    return ", ".join(
+        (
+            f'db;dur={profile.db * 1000:.1f};desc="{profile.queries} SQL"',
+            f"tpl;dur={profile.template * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+            f'size;desc="{size} B"',
+        )
+    )
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(_install_wrapper, dispatch_uid="touragency_profiling")
+        for connection in connections.all(initialized_only=True):
+            _install_wrapper(connection=connection)
+
+    def _metrics_response(self, request):
+        url = settings.PROFILING_METRICS_URL
+        if url and request.path == url:
+            return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+        return None
+
+    def _start(self):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return None, None
+        profile = RequestProfile()
+        return profile, _profile.set(profile)
+
+    def _finish(self, request, response, profile, started):
+        total = time.perf_counter() - started
+        size = _response_size(response)
+        match = getattr(request, "resolver_match", None)
+        registry.observe(match.view_name if match else UNRESOLVED, request.method, total, profile, size)
+        response["Server-Timing"] = _server_timing(profile, total, size)
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if (metrics := self._metrics_response(request)) is not None:
+            return metrics
+        profile, token = self._start()
+        if profile is None:
+            return self.get_response(request)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+        return self._finish(request, response, profile, started)
+
+    async def __acall__(self, request):
+        if (metrics := self._metrics_response(request)) is not None:
+            return metrics
+        profile, token = self._start()
+        if profile is None:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _profile.reset(token)
+        return self._finish(request, response, profile, started)
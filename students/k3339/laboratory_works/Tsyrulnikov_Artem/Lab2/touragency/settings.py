@@ -18,19 +18,22 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "touragency.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "touragency.db_routing.PrimaryPinMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "tours.audit.AuditRequestMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
 ]
 
-ROOT_URLCONF = "touragency.urls"
+ROOT_URLCONF = os.environ.get("TOURAGENCY_URLCONF", "touragency.urls")
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "touragency.profiling.ProfilingDjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -46,16 +49,82 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "touragency.wsgi.application"
 
-DATABASES = {
+if os.environ.get("TOURAGENCY_DB") == "sqlite":
+    # Local stand-in for primary/replica: python manage.py sync_sqlite_replica copies the data over.
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+            # A file, unlike the in-memory default, lets the concurrent booking test use several connections.
+            "TEST": {"NAME": BASE_DIR / "test-db.sqlite3"},
+        },
+        "replica": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db-replica.sqlite3",
+            "TEST": {"MIRROR": "default"},
+        },
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("POSTGRES_DB", "app"),
+            "USER": os.environ.get("POSTGRES_USER", "user"),
+            "PASSWORD": os.environ.get("POSTGRES_PASSWORD", "password"),
+            "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+            "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        }
+    }
+    replica_hosts = [host for host in os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(",") if host]
+    for index, host in enumerate(replica_hosts, start=1):
+        DATABASES[f"replica_{index}"] = {
+            **DATABASES["default"],
+            "HOST": host,
+            "TEST": {"MIRROR": "default"},
+        }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["touragency.db_routing.PrimaryReplicaRouter"]
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", 5))
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": os.environ.get("POSTGRES_DB", "app"),
-        "USER": os.environ.get("POSTGRES_USER", "user"),
-        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", "password"),
-        "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
-        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "touragency"),
     }
 }
+TOUR_CARD_CACHE_TIMEOUT = int(os.environ.get("TOUR_CARD_CACHE_TIMEOUT", 60 * 60))
+
+# Share of requests profiled into Server-Timing and the per-view histograms;
+# PROFILING_METRICS_URL (e.g. /metrics) serves them in Prometheus text format, off when empty.
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", 1.0 if DEBUG else 0.01))
+PROFILING_METRICS_URL = os.environ.get("PROFILING_METRICS_URL", "")
+
+# Reservation status history is buffered in process; see tours.audit.
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", 200))
+AUDIT_FLUSH_SECONDS = float(os.environ.get("AUDIT_FLUSH_SECONDS", 2.0))
+# The flusher writes from its own thread. On SQLite, IMMEDIATE takes the write lock up front, so
+# it and a request wait for each other instead of failing with "database is locked"; the timeout
+# (seconds) covers a burst of bookings queued behind one another.
+for database in DATABASES.values():
+    if database["ENGINE"] == "django.db.backends.sqlite3":
+        database.setdefault("OPTIONS", {}).update(transaction_mode="IMMEDIATE", timeout=30)
+
+# Live reservation status updates (tours.live): the pub/sub class and the SSE keep-alive period.
+RESERVATION_BROKER = os.environ.get("RESERVATION_BROKER", "tours.live.LocalBroker")
+RESERVATION_EVENTS_KEEPALIVE = float(os.environ.get("RESERVATION_EVENTS_KEEPALIVE", 25.0))
+
+# archive_reservations moves cancelled bookings and trips older than this to ArchivedReservation.
+RESERVATION_ARCHIVE_DAYS = int(os.environ.get("RESERVATION_ARCHIVE_DAYS", 180))
+
+# Content-addressed tour photos; see tours.storage.
+TOUR_IMAGE_ROOT = Path(os.environ.get("TOUR_IMAGE_ROOT", BASE_DIR / "media" / "tours"))
+TOUR_IMAGE_MAX_BYTES = int(os.environ.get("TOUR_IMAGE_MAX_BYTES", 10 * 1024 * 1024))
+TOUR_IMAGE_TYPES = ("image/jpeg", "image/png", "image/webp", "image/gif")
+# "X-Accel-Redirect" (nginx, with an internal location mapped to TOUR_IMAGE_ROOT at
+# TOUR_IMAGE_SENDFILE_URL) or "X-Sendfile" (Apache); empty streams the file from Django.
+TOUR_IMAGE_SENDFILE = os.environ.get("TOUR_IMAGE_SENDFILE", "")
+TOUR_IMAGE_SENDFILE_URL = os.environ.get("TOUR_IMAGE_SENDFILE_URL", "/protected/tours/")
 
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
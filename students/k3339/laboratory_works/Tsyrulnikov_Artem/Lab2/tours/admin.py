@@ -1,12 +1,36 @@
+import io
+import time
+
 from django import forms
-from django.contrib import admin
-from django.utils.html import format_html
+from django.contrib import admin, messages
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.html import format_html, format_html_join
+
+from touragency.db_routing import replica_reads
 
-from .models import Reservation, Review, Tour
+from .bulk import set_reservation_status
+from .capacity import SoldOut, has_capacity
+from .forms import departure_error, is_departure
+from .models import ArchivedReservation, PartnerToken, Reservation, ReservationEvent, Review, Tour
+from .pagination import EstimatedCountPaginator
+from .search import filter_tours
+from .storage import ImageRejected, check_upload
+from .transfer import (
+    FORMATS,
+    ImportRowError,
+    export_lines,
+    guess_format,
+    import_tours,
+    read_rows,
+    reservation_export_rows,
+)
 
 
 class TourAdminForm(forms.ModelForm):
-    image_file = forms.FileField(required=False, label="Фото")
+    image_file = forms.FileField(required=False, label="Фото", help_text="JPEG, PNG, WebP или GIF.")
     clear_image = forms.BooleanField(required=False, label="Удалить фото")
 
     class Meta:
@@ -15,27 +39,63 @@ class TourAdminForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        if self.instance and self.instance.image:
+        if self.instance and self.instance.image_hash:
             self.fields["image_file"].help_text = "Загрузите новый файл, чтобы заменить текущее фото."
         else:
             self.fields["clear_image"].widget = forms.HiddenInput()
 
+    def clean_image_file(self):
+        image_file = self.cleaned_data.get("image_file")
+        if image_file:
+            try:
+                check_upload(image_file)
+            except ImageRejected as exc:
+                raise forms.ValidationError(str(exc)) from exc
+        return image_file
+
     def save(self, commit=True):
-        image_file = self.cleaned_data.pop("image_file", None)
-        clear_image = self.cleaned_data.pop("clear_image", False)
-        if clear_image:
-            self.instance.image = None
-            self.instance.image_mime = ""
-        elif image_file:
-            self.instance.image = image_file.read()
-            self.instance.image_mime = image_file.content_type or "image/jpeg"
+        # The upload is streamed into the image store in chunks; only the hash lands on the tour.
+        if self.cleaned_data.get("image_file"):
+            self.instance.set_image(self.cleaned_data["image_file"])
+        elif self.cleaned_data.get("clear_image"):
+            self.instance.set_image(None)
         return super().save(commit=commit)
 
 
+class ReplicaChangeListMixin:
+    # Changelist pages read from a replica; actions (POST) and change forms stay on the primary.
+    def changelist_view(self, request, extra_context=None):
+        return replica_reads(super().changelist_view)(request, extra_context)
+
+
+class LeanChangeListMixin(ReplicaChangeListMixin):
+    # Changelist rows load only the listed columns; the change form still gets full objects.
+    list_only: tuple[str, ...] = ()
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        only = self.list_only
+
+        class LeanChangeList(super().get_changelist(request, **kwargs)):
+            def get_queryset(self, request, exclude_parameters=None):
+                return super().get_queryset(request, exclude_parameters).only(*only)
+
+        return LeanChangeList
+
+
+class TourImportForm(forms.Form):
+    file = forms.FileField(label="Файл CSV или JSONL", help_text="Фото передаются колонкой image_base64.")
+    format = forms.ChoiceField(
+        label="Формат", required=False, choices=[("", "по расширению"), *((fmt, fmt.upper()) for fmt in FORMATS)]
+    )
+
+
 @admin.register(Tour)
-class TourAdmin(admin.ModelAdmin):
+class TourAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     form = TourAdminForm
-    list_display = ("name", "agency", "country", "start_date", "end_date")
+    change_list_template = "admin/tours/tour/change_list.html"
+    list_display = ("name", "agency", "country", "start_date", "end_date", "capacity", "avg_rating", "review_count")
     search_fields = ("name", "agency", "country")
     list_filter = ("country", "start_date")
     readonly_fields = ("image_preview",)
@@ -49,6 +109,7 @@ class TourAdmin(admin.ModelAdmin):
                     "description",
                     "country",
                     ("start_date", "end_date"),
+                    "capacity",
                     "payment_terms",
                 )
             },
@@ -56,23 +117,227 @@ class TourAdmin(admin.ModelAdmin):
         ("Фото", {"fields": ("image_preview", "image_file", "clear_image")}),
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).without_blobs()
+
+    def get_urls(self):
+        urls = [path("import/", self.admin_site.admin_view(self.import_view), name="tours_tour_import")]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect("admin:tours_tour_changelist")
+        form = TourImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            fmt = form.cleaned_data["format"] or guess_format(upload.name)
+            started = time.perf_counter()
+            try:
+                stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+                imported = import_tours(read_rows(stream, fmt))
+            except (ImportRowError, UnicodeDecodeError) as exc:
+                self.message_user(request, f"{exc}; импорт отменён.", messages.ERROR)
+            else:
+                elapsed = time.perf_counter() - started
+                self.message_user(
+                    request,
+                    f"Импортировано туров: {imported} за {elapsed:.2f} с "
+                    f"({imported / max(elapsed, 1e-9):.0f} строк/с).",
+                    messages.SUCCESS,
+                )
+                return redirect("admin:tours_tour_changelist")
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Импорт туров",
+            "form": form,
+        }
+        return TemplateResponse(request, "admin/tours/tour/import.html", context)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return filter_tours(queryset, search_term), False
+
     def image_preview(self, obj):
-        if obj.image_data_url:
-            return format_html('<img src="{}" style="max-width:200px;">', obj.image_data_url)
+        if obj.preview_image_url:
+            return format_html('<img src="{}" style="max-width:200px;">', obj.preview_image_url)
         return "нет"
     image_preview.short_description = "Текущее фото"
 
 
+class ReservationAdminForm(forms.ModelForm):
+    class Meta:
+        model = Reservation
+        fields = "__all__"
+
+    def clean(self):
+        cleaned_data = super().clean()
+        tour = cleaned_data.get("tour")
+        start, end = cleaned_data.get("travel_start"), cleaned_data.get("travel_end")
+        guests = cleaned_data.get("guests")
+        if tour and start and end and not is_departure(tour, start, end):
+            raise forms.ValidationError(departure_error(tour))
+        if (
+            tour
+            and start
+            and end
+            and guests
+            and cleaned_data.get("status") != Reservation.CANCELLED
+            and not has_capacity(tour, start, end, guests, exclude_pk=self.instance.pk)
+        ):
+            raise forms.ValidationError("На выбранные даты не осталось мест.")
+        return cleaned_data
+
+
+class StatusHistoryMixin:
+    readonly_fields = ("status_history",)
+    history_limit = 50
+
+    @admin.display(description="История статусов")
+    def status_history(self, obj):
+        if obj is None or obj.pk is None:
+            return "—"
+        # Served by reservation_event_recent_idx; events reach the table within AUDIT_FLUSH_SECONDS.
+        events = (
+            ReservationEvent.objects.filter(reservation_id=obj.pk)
+            .select_related("actor")
+            .only("old_status", "new_status", "source", "created_at", "actor__username")[: self.history_limit]
+        )
+        rows = format_html_join(
+            "",
+            "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>",
+            (
+                (
+                    event.created_at.strftime("%d.%m.%Y %H:%M:%S"),
+                    event.get_old_status_display() or "—",
+                    event.get_new_status_display(),
+                    event.source,
+                    event.actor.username if event.actor else "—",
+                )
+                for event in events
+            ),
+        )
+        if not rows:
+            return "нет записей"
+        return format_html(
+            "<table><tr><th>Когда</th><th>Было</th><th>Стало</th><th>Источник</th><th>Кто</th></tr>{}</table>",
+            rows,
+        )
+
+
 @admin.register(Reservation)
-class ReservationAdmin(admin.ModelAdmin):
+class ReservationAdmin(StatusHistoryMixin, LeanChangeListMixin, admin.ModelAdmin):
+    form = ReservationAdminForm
     list_display = ("tour", "user", "status", "travel_start", "travel_end", "reserved_at")
     list_filter = ("status", "tour__country")
+    list_select_related = ("tour", "user")
+    list_only = (
+        "status",
+        "travel_start",
+        "travel_end",
+        "reserved_at",
+        "tour__name",
+        "tour__country",
+        "user__username",
+    )
     search_fields = ("tour__name", "user__username")
     autocomplete_fields = ("tour", "user")
+    actions = ("confirm", "cancel", "reset_to_pending", "export_csv", "export_jsonl")
+
+    def _set_status(self, request, queryset, status: str) -> None:
+        try:
+            updated = set_reservation_status(queryset, status)
+        except SoldOut as exc:
+            self.message_user(request, f"{exc}. Статусы не изменены.", messages.ERROR)
+            return
+        label = dict(Reservation.STATUS_CHOICES)[status]
+        self.message_user(request, f"Статус «{label}» установлен у бронирований: {updated}.", messages.SUCCESS)
+
+    @admin.action(description="Подтвердить выбранные бронирования")
+    def confirm(self, request, queryset):
+        self._set_status(request, queryset, Reservation.CONFIRMED)
+
+    @admin.action(description="Отменить выбранные бронирования")
+    def cancel(self, request, queryset):
+        self._set_status(request, queryset, Reservation.CANCELLED)
+
+    @admin.action(description="Вернуть выбранные бронирования в ожидание")
+    def reset_to_pending(self, request, queryset):
+        self._set_status(request, queryset, Reservation.PENDING)
+
+    def _export(self, queryset, fmt: str) -> StreamingHttpResponse:
+        content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        response = StreamingHttpResponse(
+            export_lines(reservation_export_rows(queryset), fmt), content_type=f"{content_type}; charset=utf-8"
+        )
+        response["Content-Disposition"] = f'attachment; filename="reservations.{fmt}"'
+        return response
+
+    @admin.action(description="Выгрузить выбранные бронирования в CSV")
+    def export_csv(self, request, queryset):
+        return self._export(queryset, "csv")
+
+    @admin.action(description="Выгрузить выбранные бронирования в JSONL")
+    def export_jsonl(self, request, queryset):
+        return self._export(queryset, "jsonl")
 
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(LeanChangeListMixin, admin.ModelAdmin):
     list_display = ("tour", "author", "rating", "created_at")
     list_filter = ("rating", "tour__country")
+    list_select_related = ("tour", "author")
+    list_only = ("rating", "created_at", "tour__name", "tour__country", "author__username")
     search_fields = ("tour__name", "author__username", "text")
+
+
+@admin.register(ReservationEvent)
+class ReservationEventAdmin(LeanChangeListMixin, admin.ModelAdmin):
+    list_display = ("reservation_id", "old_status", "new_status", "source", "actor", "created_at")
+    list_filter = ("new_status", "source")
+    list_select_related = ("actor",)
+    list_only = ("reservation_id", "old_status", "new_status", "source", "created_at", "actor__username")
+    search_fields = ("=reservation_id",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedReservation)
+class ArchivedReservationAdmin(StatusHistoryMixin, LeanChangeListMixin, admin.ModelAdmin):
+    list_display = ("tour", "user", "status", "travel_start", "travel_end", "reserved_at", "archived_at")
+    list_filter = ("status", "tour__country")
+    list_select_related = ("tour", "user")
+    list_only = (
+        "status",
+        "travel_start",
+        "travel_end",
+        "reserved_at",
+        "archived_at",
+        "tour__name",
+        "tour__country",
+        "user__username",
+    )
+    search_fields = ("tour__name", "user__username")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PartnerToken)
+class PartnerTokenAdmin(admin.ModelAdmin):
+    # Keys are issued by the issue_partner_token command; here they can only be reviewed and revoked.
+    list_display = ("name", "user", "created_at")
+    list_select_related = ("user",)
+    search_fields = ("name", "user__username")
+    readonly_fields = ("user", "name", "key_hash", "created_at")
+
+    def has_add_permission(self, request):
+        return False
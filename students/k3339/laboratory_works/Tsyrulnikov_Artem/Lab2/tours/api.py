@@ -0,0 +1,232 @@
+import datetime
+import hashlib
+import json
+from collections.abc import Callable, Iterator
+from functools import wraps
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from .availability import filter_available, remaining_seats
+from .bulk import BULK_RESERVATION_MAX_ROWS, create_reservations, validate_reservations
+from .capacity import SoldOut
+from .forms import TourSearchForm
+from .models import Review, Tour
+from .pagination import KeysetPaginator
+from .partners import token_user
+from .search import filter_tours, rank_tours
+
+TOUR_LIST_FIELDS = (
+    "id",
+    "name",
+    "agency",
+    "country",
+    "start_date",
+    "end_date",
+    "capacity",
+    "avg_rating",
+    "review_count",
+    "image_hash",
+)
+TOUR_DETAIL_FIELDS = (*TOUR_LIST_FIELDS, "description", "payment_terms")
+REVIEW_FIELDS = ("id", "author__username", "rating", "text", "tour_start", "tour_end", "created_at")
+API_PAGE_SIZE = 50
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload) -> bytes:
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def etag_for(*parts) -> str:
+    return f'"{hashlib.md5(dumps(parts), usedforsecurity=False).hexdigest()}"'
+
+
+def json_response(request: HttpRequest, build: Callable[[], object], etag: str | None = None) -> HttpResponse:
+    # The ETag is computed by the caller from cheap data (ids, sort keys, updated_at), so a
+    # matching If-None-Match is answered before the payload is queried and serialized.
+    # Without an ETag the response is sent without validators.
+    if etag is None:
+        return HttpResponse(dumps(build()), content_type="application/json")
+    response = get_conditional_response(request, etag=etag) or HttpResponse(
+        dumps(build()), content_type="application/json"
+    )
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def error_response(message: str, status: int, **extra) -> HttpResponse:
+    return HttpResponse(dumps({"error": message, **extra}), content_type="application/json", status=status)
+
+
+def _with_image_urls(row: dict) -> dict:
+    image_hash = row.pop("image_hash")
+    row["image_url"] = row["card_image_url"] = None
+    if image_hash:
+        version = f"?v={image_hash[:16]}"
+        row["image_url"] = reverse("tours:image", args=[row["id"]]) + version
+        row["card_image_url"] = reverse("tours:image", args=[row["id"], "card"]) + version
+    return row
+
+
+def _page_payload(page, rows: list) -> dict:
+    return {"results": rows, "next": page.next_cursor, "previous": page.previous_cursor}
+
+
+def _availability(request: HttpRequest) -> dict:
+    # Same fields and validation as the catalog form; malformed values are ignored there too.
+    fields = TourSearchForm.base_fields
+    values = {}
+    for name in ("date_from", "date_to", "guests"):
+        if request.GET.get(name):
+            try:
+                values[name] = fields[name].clean(request.GET[name])
+            except ValidationError:
+                continue
+    return values
+
+
+@require_GET
+def tour_list(request: HttpRequest) -> HttpResponse:
+    tours = Tour.objects.all()
+    query = request.GET.get("q", "").strip()
+    keys = ("start_date", "id")
+    if request.GET.get("country"):
+        tours = tours.filter(country=request.GET["country"])
+    if request.GET.get("min_rating", "").isdigit():
+        tours = tours.filter(avg_rating__gte=int(request.GET["min_rating"]))
+    availability = _availability(request)
+    if availability:
+        tours = filter_available(tours, **availability)
+    if query:
+        tours = filter_tours(tours, query)
+    if request.GET.get("sort") == "rating":
+        keys = ("-avg_rating", "id")
+    elif query:
+        tours = rank_tours(tours, query)
+        keys = ("-rank", "id")
+    # The page is found on the sort keys alone; the full rows are loaded only for a 200.
+    fields = dict.fromkeys(("id", "updated_at", *(key.lstrip("-") for key in keys)))
+    page = KeysetPaginator(tours.values(*fields), keys, API_PAGE_SIZE).page(request.GET.get("cursor"))
+    # Free seats change with every booking, which Tour.updated_at does not track.
+    etag = None if availability else etag_for(page.object_list, page.has_next, page.has_previous)
+
+    def build() -> dict:
+        details = Tour.objects.filter(pk__in=[row["id"] for row in page])
+        if availability:
+            details = details.annotate(seats_left=remaining_seats())
+        details = details.values(*TOUR_LIST_FIELDS, *(("seats_left",) if availability else ()))
+        by_id = {row["id"]: row for row in details}
+        rows = [_with_image_urls(by_id[row["id"]]) for row in page if row["id"] in by_id]
+        return _page_payload(page, rows)
+
+    return json_response(request, build, etag)
+
+
+@require_GET
+def tour_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    updated_at = Tour.objects.filter(pk=pk).values_list("updated_at", flat=True).first()
+    if updated_at is None:
+        raise Http404
+
+    def build() -> dict:
+        row = Tour.objects.filter(pk=pk).values(*TOUR_DETAIL_FIELDS).first()
+        if row is None:
+            raise Http404
+        return _with_image_urls(row)
+
+    return json_response(request, build, etag_for(updated_at))
+
+
+@require_GET
+def tour_reviews(request: HttpRequest, pk: int) -> HttpResponse:
+    if not Tour.objects.filter(pk=pk).exists():
+        raise Http404
+    reviews = Review.objects.filter(tour_id=pk)
+    paginator = KeysetPaginator(reviews.values("id", "created_at", "updated_at"), ("-created_at", "-id"), API_PAGE_SIZE)
+    page = paginator.page(request.GET.get("cursor"))
+
+    def build() -> dict:
+        details = reviews.filter(pk__in=[row["id"] for row in page]).values(*REVIEW_FIELDS)
+        by_id = {row["id"]: row for row in details}
+        rows = []
+        for key in page:
+            row = by_id.get(key["id"])
+            if row is not None:
+                row["author"] = row.pop("author__username")
+                rows.append(row)
+        return _page_payload(page, rows)
+
+    return json_response(request, build, etag_for(page.object_list, page.has_next, page.has_previous))
+
+
+def partner_api(view):
+    # Only the partner token authenticates these views; the session cookie is ignored, so the
+    # CSRF check (which protects cookie-authenticated requests) is not needed.
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        user = token_user(request)
+        if user is None:
+            response = error_response("Нужен токен партнёра: Authorization: Bearer <ключ>.", 401)
+            response["WWW-Authenticate"] = 'Bearer realm="partner-api"'
+            return response
+        request.user = user
+        return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+@partner_api
+@require_POST
+def tour_reservations_bulk(request: HttpRequest, pk: int) -> HttpResponse:
+    # Partner accounts need the tours.add_reservation permission; the group is booked all or nothing.
+    if not request.user.has_perm("tours.add_reservation"):
+        return error_response("Нет права бронировать за других пользователей.", 403)
+    tour = Tour.objects.only("id", "capacity", "start_date", "end_date").filter(pk=pk).first()
+    if tour is None:
+        raise Http404
+    try:
+        items = json.loads(request.body)["reservations"]
+    except (ValueError, KeyError, TypeError):
+        return error_response("Ожидается JSON вида {\"reservations\": [...]}.", 400)
+    if not isinstance(items, list) or not 0 < len(items) <= BULK_RESERVATION_MAX_ROWS:
+        return error_response(f"Нужно от 1 до {BULK_RESERVATION_MAX_ROWS} бронирований.", 400)
+    reservations, errors = validate_reservations(tour, items)
+    if errors:
+        results = [{"row": row, "errors": errors[row]} for row in sorted(errors)]
+        return error_response("Группа не забронирована: исправьте ошибки в строках.", 400, results=results)
+    try:
+        created = create_reservations(reservations)
+    except SoldOut as exc:
+        return error_response(str(exc), 409)
+    except IntegrityError:
+        return error_response("Часть бронирований уже создана параллельным запросом, повторите.", 409)
+    results = [{"row": row, "id": item.pk, "status": item.status} for row, item in enumerate(created)]
+    payload = {"created": len(created), "results": results}
+    return HttpResponse(dumps(payload), content_type="application/json", status=201)
+
+
+def _export_lines() -> Iterator[bytes]:
+    rows = Tour.objects.order_by("id").values(*TOUR_DETAIL_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for row in rows:
+        yield dumps(row) + b"\n"
+
+
+@require_GET
+def tour_export(request: HttpRequest) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(_export_lines(), content_type="application/x-ndjson")
+    response["Content-Disposition"] = 'attachment; filename="tours.jsonl"'
+    return response
@@ -0,0 +1,51 @@
+from datetime import date
+
+from django.db import connections, router, transaction
+from django.db.models import Q, QuerySet
+
+from .models import ArchivedReservation, Reservation
+
+ARCHIVE_FIELDS = ("id", "user_id", "tour_id", "guests", "travel_start", "travel_end", "status", "reserved_at")
+ARCHIVE_BATCH_SIZE = 1000
+
+# Cancelled reservations and trips that ended before the horizon move to ArchivedReservation.
+# Each batch is its own short transaction (copy, then delete), walked in id order, so the command
+# can be stopped at any point and simply run again. Sales totals and seats are left alone: the
+# summary keeps counting archived sales (country moves and deletes of archived rows adjust it,
+# see tours.signals) and finished trips no longer hold seats.
+
+
+def archivable(before: date) -> QuerySet:
+    return Reservation.objects.filter(Q(status=Reservation.CANCELLED) | Q(travel_end__lt=before))
+
+
+def archive_batch(
+    before: date, after_id: int = 0, batch_size: int = ARCHIVE_BATCH_SIZE
+) -> tuple[int, int | None]:
+    using = router.db_for_write(Reservation)
+    with transaction.atomic(using=using):
+        # Rows being edited right now are skipped (Postgres) and picked up by the next run.
+        rows = list(
+            archivable(before)
+            .filter(pk__gt=after_id)
+            .using(using)
+            .select_for_update(skip_locked=True)
+            .order_by("pk")
+            .values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0, None
+        ArchivedReservation.objects.using(using).bulk_create(
+            [ArchivedReservation(**row) for row in rows], ignore_conflicts=True
+        )
+        # A plain DELETE: the Reservation delete signals would release seats, subtract sales and
+        # log the rows as deleted, none of which applies to archiving.
+        ids = [row["id"] for row in rows]
+        connection = connections[using]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {connection.ops.quote_name(Reservation._meta.db_table)} "
+                f"WHERE id IN ({', '.join(['%s'] * len(ids))})",
+                ids,
+            )
+    return len(rows), rows[-1]["id"]
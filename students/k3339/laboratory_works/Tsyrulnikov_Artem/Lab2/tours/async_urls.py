@@ -0,0 +1,24 @@
+from django.urls import URLPattern, path
+
+from touragency.db_routing import replica_reads
+
+from . import async_views
+from .urls import app_name
+from .urls import urlpatterns as sync_urlpatterns
+
+ASYNC_VIEWS = {
+    "list": replica_reads(async_views.AsyncTourListView.as_view()),
+    "detail": replica_reads(async_views.AsyncTourDetailView.as_view()),
+    "sales": replica_reads(async_views.AsyncSalesByCountryView.as_view()),
+    "my_reservations": async_views.my_reservations,
+    "reservation_events": async_views.reservation_events,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS[pattern.name], name=pattern.name)
+    if isinstance(pattern, URLPattern) and pattern.name in ASYNC_VIEWS
+    else pattern
+    for pattern in sync_urlpatterns
+]
+
+__all__ = ["app_name", "urlpatterns"]
@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.views.generic import ListView
+
+from .forms import ReviewForm
+from .live import broker, user_channel
+from .models import Tour
+from .search import country_facet_queryset
+from .views import (
+    SalesReportMixin,
+    TourDetailView,
+    TourListView,
+    reservation_paginator,
+    review_paginator,
+)
+
+# Async counterparts of the read-only views for the ASGI entry point (touragency.asgi_urls).
+# Templates are returned as TemplateResponse so rendering, which may touch the session
+# and request.user, runs after the view in a worker thread.
+
+
+class AsyncTourListView(TourListView):
+    async def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        self.object_list = self.get_queryset()
+        page = await self.aget_keyset_page(self.object_list)
+        facets = [facet async for facet in country_facet_queryset(self.facet_queryset)]
+        ctx = {"view": self, "page": page, "object_list": page.object_list, "tours": page.object_list}
+        return self.render_to_response(self.get_catalog_context(ctx, facets))
+
+
+class AsyncTourDetailView(TourDetailView):
+    async def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        try:
+            self.object = await self.get_queryset().aget(pk=kwargs["pk"])
+        except Tour.DoesNotExist as exc:
+            raise Http404 from exc
+        ctx = {
+            "view": self,
+            "object": self.object,
+            "tour": self.object,
+            "reviews": await review_paginator(self.object.pk).apage(),
+            "form": ReviewForm(),
+        }
+        return self.render_to_response(ctx)
+
+
+class AsyncSalesByCountryView(SalesReportMixin, ListView):
+    async def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path(), settings.LOGIN_URL)
+        self.object_list = self.get_queryset()
+        totals = [row async for row in self.object_list]
+        ctx = {"view": self, "object_list": totals, "totals": totals, "filter_form": self.filter_form}
+        return self.render_to_response(ctx)
+
+
+@login_required
+async def my_reservations(request: HttpRequest) -> HttpResponse:
+    paginator = reservation_paginator(await request.auser())
+    page = await paginator.apage(request.GET.get(paginator.cursor_param), request.GET)
+    return TemplateResponse(
+        request, "tours/reservations.html", {"reservations": page.object_list, "page": page}
+    )
+
+
+async def _status_stream(user_id: int):
+    yield b"retry: 5000\n\n"
+    async with broker.subscribe(user_channel(user_id)) as queue:
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), settings.RESERVATION_EVENTS_KEEPALIVE)
+            except TimeoutError:
+                # Keeps proxies from closing an idle connection.
+                yield b": keepalive\n\n"
+                continue
+            yield f"event: status\ndata: {json.dumps(message, ensure_ascii=False)}\n\n".encode()
+
+
+async def reservation_events(request: HttpRequest) -> HttpResponse:
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponseForbidden()
+    # GZipMiddleware would compress every event as a separate gzip member; keep the stream plain.
+    request.META.pop("HTTP_ACCEPT_ENCODING", None)
+    response = StreamingHttpResponse(_status_stream(user.pk), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,118 @@
+import atexit
+import logging
+import threading
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from .models import ReservationEvent
+
+logger = logging.getLogger(__name__)
+
+# Status changes are queued in process once their transaction commits (rolled back changes
+# leave no trace) and written with bulk_create by a background thread every
+# AUDIT_FLUSH_SECONDS, as soon as AUDIT_BATCH_SIZE events pile up, and at interpreter exit.
+# A crash can lose at most the events of the last interval.
+
+_request: ContextVar = ContextVar("audit_request", default=None)
+
+
+class AuditBuffer:
+    def __init__(self):
+        self._events: list[ReservationEvent] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(self, event: ReservationEvent) -> None:
+        with self._lock:
+            self._events.append(event)
+            full = len(self._events) >= settings.AUDIT_BATCH_SIZE
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+                self._thread.start()
+        if full:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._events)
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+            if not events:
+                return 0
+            try:
+                ReservationEvent.objects.bulk_create(events, batch_size=settings.AUDIT_BATCH_SIZE)
+            except DatabaseError:
+                logger.exception("Не удалось записать %d событий аудита, повторю позже", len(events))
+                with self._lock:
+                    self._events[:0] = events
+                return 0
+            return len(events)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(settings.AUDIT_FLUSH_SECONDS)
+            self._wakeup.clear()
+            if self.flush():
+                connections.close_all()
+
+
+buffer = AuditBuffer()
+atexit.register(buffer.flush)
+
+
+def _source_and_actor() -> tuple[str, int | None]:
+    request = _request.get()
+    if request is None:
+        return "system", None
+    match = request.resolver_match
+    source = "admin" if match and match.namespace == "admin" else "site"
+    user = getattr(request, "user", None)
+    return source, (user.pk if user is not None and user.is_authenticated else None)
+
+
+def record_status_change(reservation_id: int, old_status: str, new_status: str) -> None:
+    source, actor_id = _source_and_actor()
+    event = ReservationEvent(
+        reservation_id=reservation_id,
+        old_status=old_status or "",
+        new_status=new_status,
+        source=source,
+        actor_id=actor_id,
+        created_at=timezone.now(),
+    )
+    transaction.on_commit(lambda: buffer.add(event))
+
+
+class AuditRequestMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
+
+    async def __acall__(self, request):
+        token = _request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _request.reset(token)
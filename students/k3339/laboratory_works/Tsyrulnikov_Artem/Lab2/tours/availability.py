@@ -0,0 +1,67 @@
+from datetime import date
+
+from django.contrib.postgres.fields import DateRangeField
+from django.db import connections
+from django.db.backends.postgresql.psycopg_any import DateRange
+from django.db.models import F, Func, IntegerField, OuterRef, Q, QuerySet, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Reservation, TourSlot
+
+# A tour is available in [date_from, date_to] when its whole period fits in the window and its
+# departure still has seats. On Postgres the period is matched as a daterange against the GiST
+# index tour_period_gist (0016_tour_availability); elsewhere tour_period_idx on
+# (start_date, end_date) answers the same bounds as a B-tree range scan.
+
+
+class TourPeriod(Func):
+    # Must stay identical to the indexed expression for the planner to use tour_period_gist.
+    template = "daterange(%(expressions)s, '[]')"
+    output_field = DateRangeField()
+
+
+def _vendor(queryset: QuerySet) -> str:
+    return connections[queryset.db].vendor
+
+
+def filter_period(queryset: QuerySet, date_from: date | None, date_to: date | None) -> QuerySet:
+    if date_from and date_to and _vendor(queryset) == "postgresql":
+        return queryset.alias(period=TourPeriod(F("start_date"), F("end_date"))).filter(
+            period__contained_by=DateRange(date_from, date_to, "[]")
+        )
+    if date_from:
+        queryset = queryset.filter(start_date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(end_date__lte=date_to)
+    return queryset
+
+
+def remaining_seats():
+    # The slot row is authoritative once a seat was taken; before that the departure has
+    # capacity minus whatever is held without a slot (normally nothing).
+    slot = TourSlot.objects.filter(
+        tour=OuterRef("pk"), travel_start=OuterRef("start_date"), travel_end=OuterRef("end_date")
+    ).values("remaining")[:1]
+    held = (
+        Reservation.objects.filter(
+            tour=OuterRef("pk"), travel_start=OuterRef("start_date"), travel_end=OuterRef("end_date")
+        )
+        .exclude(status=Reservation.CANCELLED)
+        .order_by()
+        .values("tour")
+        .annotate(total=Sum("guests"))
+        .values("total")
+    )
+    return Coalesce(
+        Subquery(slot, output_field=IntegerField()),
+        F("capacity") - Coalesce(Subquery(held, output_field=IntegerField()), 0),
+    )
+
+
+def filter_available(
+    queryset: QuerySet, date_from: date | None = None, date_to: date | None = None, guests: int = 1
+) -> QuerySet:
+    queryset = filter_period(queryset, date_from, date_to)
+    return queryset.annotate(seats_left=remaining_seats()).filter(
+        Q(capacity__isnull=True) | Q(seats_left__gte=guests)
+    )
@@ -0,0 +1,108 @@
+import json
+import math
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+
+def percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class DatabaseTimer:
+    def __init__(self):
+        self.total = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.total += time.perf_counter() - started
+
+
+@dataclass
+class ViewResult:
+    url: str
+    status: int = 0
+    queries: int = 0
+    db_ms: float = 0.0
+    p50_ms: float = 0.0
+    p95_ms: float = 0.0
+    samples_ms: list[float] = field(default_factory=list, repr=False)
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("samples_ms")
+        return data
+
+
+def measure(client: Client, url: str, repeat: int, warmup: int = 1) -> ViewResult:
+    result = ViewResult(url=url)
+    for _ in range(warmup):
+        client.get(url)
+    db_samples = []
+    for _ in range(repeat):
+        timer = DatabaseTimer()
+        with CaptureQueriesContext(connection) as queries, connection.execute_wrapper(timer):
+            started = time.perf_counter()
+            response = client.get(url)
+            if getattr(response, "streaming", False):
+                b"".join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        result.status = response.status_code
+        result.queries = max(result.queries, len(queries))
+        result.samples_ms.append(elapsed * 1000)
+        db_samples.append(timer.total * 1000)
+    result.db_ms = round(percentile(db_samples, 50), 3)
+    result.p50_ms = round(percentile(result.samples_ms, 50), 3)
+    result.p95_ms = round(percentile(result.samples_ms, 95), 3)
+    return result
+
+
+def write_results(path: Path, meta: dict, results: dict[str, ViewResult]) -> None:
+    payload = {"meta": meta, "views": {name: result.as_dict() for name, result in results.items()}}
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2))
+
+
+def load_results(path: Path) -> dict:
+    return json.loads(path.read_text())
+
+
+def find_regressions(
+    results: dict[str, ViewResult], baseline: dict, max_slowdown: float, latency_floor_ms: float
+) -> list[str]:
+    problems = []
+    for name, result in results.items():
+        reference = baseline.get("views", {}).get(name)
+        if reference is None:
+            continue
+        if result.queries > reference["queries"]:
+            problems.append(f"{name}: запросов {reference['queries']} → {result.queries}")
+        limit = max(reference["p95_ms"] * max_slowdown, reference["p95_ms"] + latency_floor_ms)
+        if result.p95_ms > limit:
+            problems.append(f"{name}: p95 {reference['p95_ms']:.1f} → {result.p95_ms:.1f} мс")
+    return problems
+
+
+def compare_results(results: dict[str, ViewResult], baseline: dict) -> list[str]:
+    lines = []
+    for name, result in results.items():
+        reference = baseline.get("views", {}).get(name)
+        if reference is None or not result.p50_ms:
+            continue
+        lines.append(
+            f"{name:<24} p50 {reference['p50_ms']:.1f} → {result.p50_ms:.1f} мс "
+            f"(×{reference['p50_ms'] / result.p50_ms:.2f}), "
+            f"p95 {reference['p95_ms']:.1f} → {result.p95_ms:.1f} мс, "
+            f"запросов {reference['queries']} → {result.queries}"
+        )
+    return lines
@@ -0,0 +1,120 @@
+from collections.abc import Mapping, Sequence
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import QuerySet
+
+from .audit import record_status_change
+from .capacity import apply_capacity_delta, capacity_delta
+from .forms import ReservationForm, departure_error, is_departure
+from .live import notify_status_change
+from .models import Reservation, Tour
+from .sales import apply_sales_delta, sales_delta
+from .signals import RESERVATION_STATE_FIELDS
+
+User = get_user_model()
+
+BULK_RESERVATION_MAX_ROWS = 1000
+
+
+def set_reservation_status(queryset: QuerySet, status: str) -> int:
+    # One UPDATE for the whole selection; queryset.update() skips the Reservation signals, so
+    # seats, the sales summary, the audit log and live updates are handled here from the changed rows.
+    with transaction.atomic():
+        before = list(
+            queryset.exclude(status=status)
+            .select_for_update(of=("self",))
+            .order_by("pk")
+            .values("pk", "user_id", *RESERVATION_STATE_FIELDS)
+        )
+        if not before:
+            return 0
+        after = [{**row, "status": status} for row in before]
+        apply_capacity_delta(capacity_delta(before, after))
+        updated = Reservation.objects.filter(pk__in=[row["pk"] for row in before]).update(status=status)
+        apply_sales_delta(sales_delta(before, after))
+        for row in before:
+            record_status_change(row["pk"], row["status"], status)
+            notify_status_change(row["user_id"], row["pk"], status)
+    return updated
+
+
+def validate_reservations(
+    tour: Tour, items: Sequence[Mapping]
+) -> tuple[list[Reservation], dict[int, dict[str, list[str]]]]:
+    # Fields are cleaned with ReservationForm's own field definitions, without building a form
+    # per row, and each distinct raw value once (a group usually shares its dates); users and
+    # existing duplicates (unique_together) then take one query each.
+    reservations: list[Reservation] = []
+    errors: dict[int, dict[str, list[str]]] = {}
+    rows = []
+    fields = ReservationForm.base_fields
+    cleaned_values: dict[tuple[str, str], object] = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, Mapping):
+            errors[index] = {"__all__": ["Ожидается объект с полями бронирования."]}
+            continue
+        cleaned, row_errors = {}, {}
+        for name, field in fields.items():
+            key = (name, str(item.get(name)))
+            if key not in cleaned_values:
+                try:
+                    cleaned_values[key] = field.clean(item.get(name))
+                except ValidationError as exc:
+                    cleaned_values[key] = exc
+            value = cleaned_values[key]
+            if isinstance(value, ValidationError):
+                row_errors[name] = value.messages
+            else:
+                cleaned[name] = value
+        if not row_errors and not is_departure(tour, cleaned["travel_start"], cleaned["travel_end"]):
+            row_errors["__all__"] = [departure_error(tour)]
+        if row_errors:
+            errors[index] = row_errors
+        else:
+            rows.append((index, str(item.get("user", "")), Reservation(**cleaned)))
+    user_ids = dict(User.objects.filter(username__in={name for _, name, _ in rows}).values_list("username", "id"))
+    taken = set(
+        Reservation.objects.filter(tour=tour, user_id__in=user_ids.values()).values_list(
+            "user_id", "travel_start", "travel_end"
+        )
+    )
+    seen = set()
+    for index, username, reservation in rows:
+        if username not in user_ids:
+            errors[index] = {"user": ["Пользователь не найден."]}
+            continue
+        key = (user_ids[username], reservation.travel_start, reservation.travel_end)
+        if key in taken:
+            errors[index] = {"__all__": ["Такое бронирование уже существует."]}
+            continue
+        if key in seen:
+            errors[index] = {"__all__": ["Бронирование повторяется в заявке."]}
+            continue
+        seen.add(key)
+        reservation.user_id, reservation.tour = key[0], tour
+        reservations.append(reservation)
+    return reservations, errors
+
+
+def create_reservations(reservations: list[Reservation]) -> list[Reservation]:
+    # bulk_create skips the Reservation signals: seats are taken for the whole group up front
+    # (SoldOut rolls everything back) and new pending rows do not touch the sales summary.
+    after = [
+        {
+            "status": reservation.status,
+            "guests": reservation.guests,
+            "tour_id": reservation.tour_id,
+            "travel_start": reservation.travel_start,
+            "travel_end": reservation.travel_end,
+        }
+        for reservation in reservations
+    ]
+    with transaction.atomic():
+        apply_capacity_delta(capacity_delta(after=after))
+        created = Reservation.objects.bulk_create(reservations, batch_size=BULK_RESERVATION_MAX_ROWS)
+        for reservation in created:
+            record_status_change(reservation.pk, "", reservation.status)
+            notify_status_change(reservation.user_id, reservation.pk, reservation.status)
+    return created
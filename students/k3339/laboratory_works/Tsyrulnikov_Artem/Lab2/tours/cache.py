@@ -0,0 +1,46 @@
+import time
+from collections.abc import Iterable
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+CARD_FRAGMENT = "tour_card"
+CATALOG_DELETED_KEY = "catalog:deleted_at"
+
+
+def _card_version_key(tour_id: int) -> str:
+    return f"{CARD_FRAGMENT}:version:{tour_id}"
+
+
+def attach_card_versions(tours: Iterable) -> None:
+    tours = list(tours)
+    keys = {tour.pk: _card_version_key(tour.pk) for tour in tours}
+    versions = cache.get_many(keys.values())
+    # A lost version must never fall back to a value an old fragment was cached under.
+    missing = {key: time.time_ns() for key in keys.values() if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    for tour in tours:
+        tour.card_version = versions[keys[tour.pk]]
+
+
+def bump_card_version(tour_id: int) -> None:
+    cache.set(_card_version_key(tour_id), time.time_ns(), timeout=None)
+
+
+def card_cache_timeout() -> int:
+    return settings.TOUR_CARD_CACHE_TIMEOUT
+
+
+def catalog_deleted_at() -> datetime:
+    # Deleting a tour leaves MAX(updated_at) unchanged, so the catalog's Last-Modified also
+    # takes this marker into account. A lost marker restarts at "now", which only costs a 200.
+    cache.add(CATALOG_DELETED_KEY, timezone.now(), timeout=None)
+    return cache.get(CATALOG_DELETED_KEY) or timezone.now()
+
+
+def mark_catalog_deleted() -> None:
+    cache.set(CATALOG_DELETED_KEY, timezone.now(), timeout=None)
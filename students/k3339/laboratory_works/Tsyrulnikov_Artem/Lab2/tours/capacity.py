@@ -0,0 +1,87 @@
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+from datetime import date
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import Reservation, Tour, TourSlot
+
+SlotKey = tuple[int, date, date]
+
+
+class SoldOut(Exception):
+    pass
+
+
+def holds(rows: Iterable[Mapping]) -> dict[SlotKey, int]:
+    seats: dict[SlotKey, int] = defaultdict(int)
+    for row in rows:
+        if row["status"] != Reservation.CANCELLED:
+            seats[(row["tour_id"], row["travel_start"], row["travel_end"])] += row["guests"]
+    return seats
+
+
+def capacity_delta(before: Iterable[Mapping] = (), after: Iterable[Mapping] = ()) -> dict[SlotKey, int]:
+    delta: dict[SlotKey, int] = defaultdict(int)
+    for key, guests in holds(before).items():
+        delta[key] += guests
+    for key, guests in holds(after).items():
+        delta[key] -= guests
+    return {key: value for key, value in delta.items() if value}
+
+
+def _create_slot(tour_id: int, start: date, end: date, capacity: int) -> int:
+    held = (
+        Reservation.objects.filter(tour_id=tour_id, travel_start=start, travel_end=end)
+        .exclude(status=Reservation.CANCELLED)
+        .aggregate(total=Sum("guests"))["total"]
+        or 0
+    )
+    slot, _ = TourSlot.objects.get_or_create(
+        tour_id=tour_id, travel_start=start, travel_end=end, defaults={"remaining": capacity - held}
+    )
+    return slot.pk
+
+
+def apply_capacity_delta(delta: Mapping[SlotKey, int]) -> None:
+    # Positive deltas release seats, negative ones take them; the caller owns the transaction.
+    # Slots are updated in key order so two concurrent transfers cannot deadlock each other.
+    if not delta:
+        return
+    capacities = dict(
+        Tour.objects.filter(pk__in={key[0] for key in delta}, capacity__isnull=False).values_list(
+            "id", "capacity"
+        )
+    )
+    with transaction.atomic():
+        for (tour_id, start, end), seats in sorted(delta.items()):
+            if tour_id not in capacities:
+                continue
+            slot = TourSlot.objects.filter(tour_id=tour_id, travel_start=start, travel_end=end)
+            if seats > 0:
+                # A missing slot is computed from the reservations when it is first needed.
+                slot.update(remaining=F("remaining") + seats)
+                continue
+            if not slot.exists():
+                slot = TourSlot.objects.filter(pk=_create_slot(tour_id, start, end, capacities[tour_id]))
+            if not slot.filter(remaining__gte=-seats).update(remaining=F("remaining") + seats):
+                raise SoldOut(f"Недостаточно мест: тур {tour_id}, {start} — {end}")
+
+
+def has_capacity(tour: Tour, start: date, end: date, guests: int, exclude_pk: int | None = None) -> bool:
+    if tour.capacity is None:
+        return True
+    held = Reservation.objects.filter(tour=tour, travel_start=start, travel_end=end).exclude(
+        status=Reservation.CANCELLED
+    )
+    if exclude_pk:
+        held = held.exclude(pk=exclude_pk)
+    return (held.aggregate(total=Sum("guests"))["total"] or 0) + guests <= tour.capacity
+
+
+def resize_slots(tour: Tour, previous_capacity: int | None) -> None:
+    if previous_capacity is None or tour.capacity is None:
+        tour.slots.all().delete()
+    elif tour.capacity != previous_capacity:
+        tour.slots.update(remaining=F("remaining") + (tour.capacity - previous_capacity))
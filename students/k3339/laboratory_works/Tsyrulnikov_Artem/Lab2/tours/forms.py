@@ -2,7 +2,7 @@ from django import forms
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 from django.contrib.auth.models import User
 
-from .models import Reservation, Review
+from .models import Reservation, Review, Tour
 
 
 class BootstrapMixin:
@@ -24,6 +24,14 @@ class UserRegistrationForm(BootstrapMixin, UserCreationForm):
         fields = ("username", "email")
 
 
+def departure_error(tour: Tour) -> str:
+    return f"Тур проходит только {tour.start_date:%d.%m.%Y} — {tour.end_date:%d.%m.%Y}."
+
+
+def is_departure(tour: Tour, start, end) -> bool:
+    return (start, end) == (tour.start_date, tour.end_date)
+
+
 class ReservationForm(BootstrapMixin, forms.ModelForm):
     class Meta:
         model = Reservation
@@ -33,6 +41,16 @@ class ReservationForm(BootstrapMixin, forms.ModelForm):
             "travel_end": forms.TextInput(attrs={"class": "js-date", "autocomplete": "off"}),
         }
 
+    def __init__(self, *args, tour: Tour | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Seats are counted per departure (TourSlot), so the dates always come from the tour;
+        # disabled fields ignore whatever the POST says.
+        tour = tour or (self.instance.tour if self.instance.tour_id else None)
+        if tour is not None:
+            for name, value in (("travel_start", tour.start_date), ("travel_end", tour.end_date)):
+                self.fields[name].disabled = True
+                self.initial[name] = value
+
 
 class ReviewForm(BootstrapMixin, forms.ModelForm):
     class Meta:
@@ -47,3 +65,44 @@ class ReviewForm(BootstrapMixin, forms.ModelForm):
 
 class LoginForm(BootstrapMixin, AuthenticationForm):
     pass
+
+
+class SalesFilterForm(BootstrapMixin, forms.Form):
+    date_from = forms.DateField(
+        required=False,
+        label="С",
+        widget=forms.TextInput(attrs={"class": "js-date", "autocomplete": "off"}),
+    )
+    date_to = forms.DateField(
+        required=False,
+        label="По",
+        widget=forms.TextInput(attrs={"class": "js-date", "autocomplete": "off"}),
+    )
+
+
+class TourSearchForm(BootstrapMixin, forms.Form):
+    q = forms.CharField(required=False, label="Поиск", max_length=200)
+    country = forms.CharField(required=False, widget=forms.HiddenInput())
+    date_from = forms.DateField(
+        required=False,
+        label="Начало не раньше",
+        widget=forms.TextInput(attrs={"class": "js-date", "autocomplete": "off"}),
+    )
+    date_to = forms.DateField(
+        required=False,
+        label="Окончание не позже",
+        widget=forms.TextInput(attrs={"class": "js-date", "autocomplete": "off"}),
+    )
+    guests = forms.IntegerField(required=False, label="Свободных мест", min_value=1, max_value=100)
+    min_rating = forms.TypedChoiceField(
+        required=False,
+        label="Рейтинг",
+        coerce=int,
+        empty_value=None,
+        choices=[("", "Любой"), (9, "от 9"), (8, "от 8"), (7, "от 7"), (5, "от 5")],
+    )
+    sort = forms.ChoiceField(
+        required=False,
+        label="Сортировка",
+        choices=[("", "По дате начала"), ("rating", "Сначала с высоким рейтингом")],
+    )
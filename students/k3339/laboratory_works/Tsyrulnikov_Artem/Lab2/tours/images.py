@@ -0,0 +1,33 @@
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+THUMBNAIL_MIME = "image/jpeg"
+THUMBNAIL_SIZES = {
+    "card": (640, 400),
+    "preview": (200, 200),
+}
+
+
+def detect_mime(source: bytes | Path | BinaryIO) -> str | None:
+    try:
+        with Image.open(BytesIO(source) if isinstance(source, bytes) else source) as image:
+            return image.get_format_mimetype()
+    except (UnidentifiedImageError, OSError):
+        return None
+
+
+def make_thumbnail(source: bytes | Path, size: tuple[int, int]) -> bytes | None:
+    try:
+        with Image.open(BytesIO(source) if isinstance(source, bytes) else source) as original:
+            image = ImageOps.exif_transpose(original)
+            image.thumbnail(size)
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            out = BytesIO()
+            image.save(out, "JPEG", quality=82, optimize=True, progressive=True)
+    except (UnidentifiedImageError, OSError):
+        return None
+    return out.getvalue()
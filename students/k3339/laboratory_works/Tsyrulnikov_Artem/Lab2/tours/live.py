@@ -0,0 +1,66 @@
+import asyncio
+import threading
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import ReservationEvent
+
+# Reservation status changes are pushed to the owner's open pages (Server-Sent Events, see
+# async_views.reservation_events). LocalBroker fans out inside one process; with several
+# ASGI workers RESERVATION_BROKER should point to a class with the same publish/subscribe
+# pair backed by a shared broker.
+
+STATUS_LABELS = dict(ReservationEvent.STATUS_CHOICES)
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class LocalBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(set)
+
+    def publish(self, channel: str, message: dict) -> None:
+        # Called from any thread; each subscriber receives the message on its own event loop.
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, message)
+            except RuntimeError:
+                continue
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, message: dict) -> None:
+        # A client that stopped reading loses messages rather than growing the queue.
+        if not queue.full():
+            queue.put_nowait(message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[asyncio.Queue]:
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE))
+        with self._lock:
+            self._subscribers[channel].add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                self._subscribers[channel].discard(subscriber)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+
+broker = import_string(settings.RESERVATION_BROKER)()
+
+
+def user_channel(user_id: int) -> str:
+    return f"reservations:{user_id}"
+
+
+def notify_status_change(user_id: int, reservation_id: int, status: str) -> None:
+    message = {"id": reservation_id, "status": status, "status_display": STATUS_LABELS.get(status, status)}
+    transaction.on_commit(lambda: broker.publish(user_channel(user_id), message))
@@ -0,0 +1,48 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tours.archive import ARCHIVE_BATCH_SIZE, archivable, archive_batch
+from tours.models import ArchivedReservation, Reservation
+
+
+class Command(BaseCommand):
+    help = "Переносит отменённые и давно завершённые бронирования в архивную таблицу небольшими пачками."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.RESERVATION_ARCHIVE_DAYS,
+            help="Архивировать поездки, закончившиеся раньше стольких дней назад.",
+        )
+        parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+        parser.add_argument("--pause", type=float, default=0.0, help="Пауза между пачками, с.")
+        parser.add_argument("--dry-run", action="store_true", help="Только посчитать, ничего не переносить.")
+
+    def handle(self, *args, **options):
+        before = timezone.localdate() - timedelta(days=options["days"])
+        if options["dry_run"]:
+            self.stdout.write(f"К архивации: {archivable(before).count()} бронирований (поездки до {before}).")
+            return
+        started = time.perf_counter()
+        moved = 0
+        after_id = 0
+        while True:
+            count, after_id = archive_batch(before, after_id, options["batch_size"])
+            if not count:
+                break
+            moved += count
+            self.stdout.write(f"Перенесено {moved}, последний id {after_id}")
+            if options["pause"]:
+                time.sleep(options["pause"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"В архив перенесено {moved} за {elapsed:.1f} с; в рабочей таблице {Reservation.objects.count()}, "
+                f"в архиве {ArchivedReservation.objects.count()}."
+            )
+        )
@@ -0,0 +1,138 @@
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+
+from tours.benchmark import percentile
+from tours.models import Tour
+
+HOST = "testserver"
+
+
+def _wsgi_environ(url: str) -> dict:
+    parts = urlsplit(url)
+    return {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": parts.path,
+        "QUERY_STRING": parts.query,
+        "SERVER_NAME": HOST,
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": HOST,
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+
+
+def _asgi_scope(url: str) -> dict:
+    parts = urlsplit(url)
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": parts.path,
+        "raw_path": parts.path.encode(),
+        "query_string": parts.query.encode(),
+        "root_path": "",
+        "headers": [(b"host", HOST.encode())],
+        "client": ("127.0.0.1", 0),
+        "server": (HOST, 80),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает пропускную способность WSGI (пул потоков) и ASGI (async-представления) "
+        "при медленных клиентах, держащих соединение после ответа."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", action="append", dest="urls", help="Можно указать несколько раз.")
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument("--clients", type=int, default=100, help="Одновременных клиентов.")
+        parser.add_argument("--threads", type=int, default=8, help="Потоков WSGI-сервера.")
+        parser.add_argument("--client-delay", type=float, default=0.1, help="Сколько клиент читает ответ, с.")
+
+    def handle(self, *args, **options):
+        urls = options["urls"] or [reverse("tours:list")]
+        if not options["urls"]:
+            tour_id = Tour.objects.values_list("id", flat=True).first()
+            if tour_id is not None:
+                urls.append(reverse("tours:detail", args=[tour_id]))
+        wsgi = self._run_wsgi(urls, options)
+        with override_settings(ROOT_URLCONF="touragency.asgi_urls"):
+            asgi = asyncio.run(self._run_asgi(urls, options))
+        for name, (elapsed, latencies, statuses) in (("WSGI", wsgi), ("ASGI", asgi)):
+            self.stdout.write(
+                f"{name}: {len(latencies) / elapsed:7.1f} req/s, "
+                f"p50={percentile(latencies, 50):.1f}мс p95={percentile(latencies, 95):.1f}мс, "
+                f"статусы {sorted(set(statuses))}"
+            )
+
+    def _run_wsgi(self, urls: list[str], options: dict):
+        application = WSGIHandler()
+        latencies, statuses = [], []
+
+        def request(url: str) -> None:
+            started = time.perf_counter()
+            status_line = []
+            body = application(_wsgi_environ(url), lambda status, headers: status_line.append(status))
+            b"".join(body)
+            # A sync worker stays busy while a slow client drains the response.
+            time.sleep(options["client_delay"])
+            body.close()
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses.append(int(status_line[0].split()[0]))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+            for i in range(options["requests"]):
+                pool.submit(request, urls[i % len(urls)])
+        return time.perf_counter() - started, latencies, statuses
+
+    async def _run_asgi(self, urls: list[str], options: dict):
+        application = ASGIHandler()
+        limit = asyncio.Semaphore(options["clients"])
+        latencies, statuses = [], []
+
+        async def request(url: str) -> None:
+            async with limit:
+                started = time.perf_counter()
+                requested, finished = False, asyncio.Event()
+
+                async def receive():
+                    nonlocal requested
+                    if not requested:
+                        requested = True
+                        return {"type": "http.request", "body": b"", "more_body": False}
+                    await finished.wait()
+                    return {"type": "http.disconnect"}
+
+                async def send(message):
+                    if message["type"] == "http.response.start":
+                        statuses.append(message["status"])
+                    elif message["type"] == "http.response.body" and not message.get("more_body"):
+                        await asyncio.sleep(options["client_delay"])
+                        finished.set()
+
+                await application(_asgi_scope(url), receive, send)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(request(urls[i % len(urls)]) for i in range(options["requests"])))
+        return time.perf_counter() - started, latencies, statuses
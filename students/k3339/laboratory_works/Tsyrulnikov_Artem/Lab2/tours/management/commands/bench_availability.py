@@ -0,0 +1,80 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from tours.availability import filter_available
+from tours.benchmark import percentile
+from tours.models import Reservation, Tour
+
+PAGE_SIZE = 12
+
+
+class Command(BaseCommand):
+    help = "Замеряет поиск свободных туров по диапазону дат: индексный запрос против перебора в Python."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--window-days", type=int, default=30)
+        parser.add_argument("--guests", type=int, default=2)
+        parser.add_argument(
+            "--scan", action="store_true", help="Сравнить с выборкой всех туров и подсчётом мест в Python."
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        bounds = Tour.objects.order_by("start_date").values_list("start_date", flat=True)
+        first, last = bounds.first(), bounds.last()
+        if first is None:
+            raise CommandError("В базе нет туров, сначала выполните seed_tours --tours 100000.")
+        rng = random.Random(options["seed"])
+        span = max((last - first).days - options["window_days"], 1)
+        windows = []
+        for _ in range(options["repeat"]):
+            date_from = first + timedelta(days=rng.randint(0, span))
+            windows.append((date_from, date_from + timedelta(days=options["window_days"])))
+        guests = options["guests"]
+        self.stdout.write(f"Туров: {Tour.objects.count()}, СУБД: {connection.vendor}, окон: {len(windows)}")
+
+        def indexed(date_from: date, date_to: date) -> int:
+            tours = filter_available(Tour.objects.only("id"), date_from, date_to, guests).order_by("start_date", "id")
+            return len(tours[:PAGE_SIZE])
+
+        self._report("индекс", indexed, windows)
+        date_from, date_to = windows[0]
+        plan = filter_available(Tour.objects.only("id"), date_from, date_to, guests).order_by("start_date", "id")
+        self.stdout.write(plan[:PAGE_SIZE].explain())
+        if options["scan"]:
+            self._report("перебор", lambda date_from, date_to: self._scan(date_from, date_to, guests), windows)
+
+    def _scan(self, date_from: date, date_to: date, guests: int) -> int:
+        held = {
+            (row["tour_id"], row["travel_start"], row["travel_end"]): row["total"]
+            for row in Reservation.objects.exclude(status=Reservation.CANCELLED)
+            .order_by()
+            .values("tour_id", "travel_start", "travel_end")
+            .annotate(total=Sum("guests"))
+        }
+        found = [
+            tour_id
+            for tour_id, start, end, capacity in Tour.objects.order_by("start_date", "id").values_list(
+                "id", "start_date", "end_date", "capacity"
+            )
+            if date_from <= start
+            and end <= date_to
+            and (capacity is None or capacity - held.get((tour_id, start, end), 0) >= guests)
+        ]
+        return len(found[:PAGE_SIZE])
+
+    def _report(self, label: str, search, windows: list[tuple[date, date]]) -> None:
+        samples = []
+        for date_from, date_to in windows:
+            started = time.perf_counter()
+            search(date_from, date_to)
+            samples.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f"{label:<8} p50={percentile(samples, 50):.2f}мс p95={percentile(samples, 95):.2f}мс"
+        )
@@ -0,0 +1,87 @@
+import json
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from tours.models import Reservation, Tour
+from tours.partners import issue_token
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Сравнивает бронирование группы по одной форме на туриста с одним запросом к bulk API."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--group", type=int, default=500)
+        parser.add_argument("--keep", action="store_true", help="Не удалять тестовые данные.")
+
+    def handle(self, *args, **options):
+        start = date.today() + timedelta(days=60)
+        end = start + timedelta(days=7)
+        tag = uuid.uuid4().hex[:8]
+        tours = [
+            Tour.objects.create(
+                name=f"Групповой тур {tag} ({path})",
+                agency="bench",
+                description="Временный тур для замера группового бронирования.",
+                country="Тест",
+                start_date=start,
+                end_date=end,
+                payment_terms="-",
+                capacity=options["group"] * 2,
+            )
+            for path in ("form", "bulk")
+        ]
+        users = User.objects.bulk_create(
+            [User(username=f"bench_{tag}_{i}") for i in range(options["group"])]
+        )
+        partner = User.objects.create(username=f"bench_{tag}_partner")
+        partner.user_permissions.add(Permission.objects.get(codename="add_reservation"))
+        row = {"guests": 1, "travel_start": start.isoformat(), "travel_end": end.isoformat()}
+        try:
+            form_seconds = self._form_path(tours[0], users, row)
+            bulk_seconds = self._bulk_path(tours[1], users, partner, row)
+        finally:
+            if not options["keep"]:
+                Tour.objects.filter(pk__in=[tour.pk for tour in tours]).delete()
+                User.objects.filter(username__startswith=f"bench_{tag}_").delete()
+
+        self.stdout.write(
+            f"Группа из {options['group']}: формы {form_seconds * 1000:.0f} мс, "
+            f"bulk API {bulk_seconds * 1000:.0f} мс (×{form_seconds / bulk_seconds:.0f})"
+        )
+
+    def _form_path(self, tour: Tour, users: list, row: dict) -> float:
+        url = reverse("tours:reserve", args=[tour.pk])
+        client = Client()
+        elapsed = 0.0
+        for user in users:
+            client.force_login(user)
+            started = time.perf_counter()
+            response = client.post(url, row)
+            elapsed += time.perf_counter() - started
+            if response.status_code != 302:
+                raise CommandError(f"Форма вернула {response.status_code} для {user.username}")
+        return elapsed
+
+    def _bulk_path(self, tour: Tour, users: list, partner, row: dict) -> float:
+        # A partner server has no CSRF cookie, so the check stays on as it would in production.
+        client = Client(enforce_csrf_checks=True, HTTP_AUTHORIZATION=f"Bearer {issue_token(partner, 'bench')}")
+        payload = json.dumps({"reservations": [{**row, "user": user.username} for user in users]})
+        started = time.perf_counter()
+        response = client.post(
+            reverse("tours:api_tour_reservations_bulk", args=[tour.pk]), payload, content_type="application/json"
+        )
+        elapsed = time.perf_counter() - started
+        if response.status_code != 201:
+            raise CommandError(f"bulk API вернул {response.status_code}: {response.content[:500]!r}")
+        if Reservation.objects.filter(tour=tour).count() != len(users):
+            raise CommandError("Создано не столько бронирований, сколько отправлено.")
+        return elapsed
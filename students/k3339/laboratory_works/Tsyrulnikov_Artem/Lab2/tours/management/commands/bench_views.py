@@ -0,0 +1,129 @@
+import platform
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import URLPattern, reverse
+
+from tours import urls as tour_urls
+from tours.benchmark import compare_results, find_regressions, load_results, measure, write_results
+from tours.models import Reservation, Tour
+
+User = get_user_model()
+
+ANONYMOUS_VIEWS = {"login", "register"}
+SESSION_ENDING_VIEWS = {"logout"}
+POST_ONLY_VIEWS = {"api_tour_reservations_bulk"}
+SAMPLE_KWARGS = {"variant": "card"}
+
+
+class Command(BaseCommand):
+    help = "Прогоняет все URL приложения tours через тестовый клиент и замеряет запросы и задержки."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--username", help="Пользователь для авторизованных страниц.")
+        parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+        parser.add_argument("--baseline", type=Path, help="JSON предыдущего прогона для сравнения.")
+        parser.add_argument(
+            "--compare",
+            type=Path,
+            help="JSON прогона с другими настройками: вывести ускорение по каждому URL без проверки регрессий.",
+        )
+        parser.add_argument("--max-slowdown", type=float, default=1.25)
+        parser.add_argument("--latency-floor-ms", type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        user = self._bench_user(options["username"])
+        reservation = Reservation.objects.filter(user=user).only("id", "tour_id").first()
+        tour_id = reservation.tour_id if reservation else Tour.objects.values_list("id", flat=True).first()
+        if tour_id is None:
+            raise CommandError("В базе нет туров, сначала выполните seed_tours.")
+
+        results = {}
+        for pattern in tour_urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name or pattern.name in POST_ONLY_VIEWS:
+                continue
+            url = self._build_url(pattern, tour_id, reservation)
+            if url is None:
+                self.stderr.write(f"Пропускаю {pattern.name}: нет подходящих данных.")
+                continue
+            client = Client(raise_request_exception=False)
+            if pattern.name not in ANONYMOUS_VIEWS:
+                client.force_login(user)
+            repeat = 1 if pattern.name in SESSION_ENDING_VIEWS else options["repeat"]
+            warmup = 0 if pattern.name in SESSION_ENDING_VIEWS else 1
+            key = self._result_key(pattern, results)
+            results[key] = measure(client, url, repeat, warmup)
+            result = results[key]
+            self.stdout.write(
+                f"{key:<24} {result.status} запросов={result.queries:<3} "
+                f"БД={result.db_ms:.1f}мс p50={result.p50_ms:.1f}мс p95={result.p95_ms:.1f}мс"
+            )
+
+        meta = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "settings": settings.SETTINGS_MODULE,
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "repeat": options["repeat"],
+            "tours": Tour.objects.count(),
+            "reservations": Reservation.objects.count(),
+        }
+        write_results(options["output"], meta, results)
+        self.stdout.write(self.style.SUCCESS(f"Результаты записаны в {options['output']}"))
+
+        if options["compare"]:
+            reference = load_results(options["compare"])
+            self.stdout.write(f"Сравнение с {reference['meta'].get('settings')}:")
+            for line in compare_results(results, reference):
+                self.stdout.write(line)
+
+        if options["baseline"]:
+            problems = find_regressions(
+                results,
+                load_results(options["baseline"]),
+                options["max_slowdown"],
+                options["latency_floor_ms"],
+            )
+            if problems:
+                raise CommandError("Регрессия производительности:\n" + "\n".join(problems))
+            self.stdout.write(self.style.SUCCESS("Регрессий относительно базового прогона нет."))
+
+    def _bench_user(self, username: str | None):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist as exc:
+                raise CommandError(f"Пользователь {username} не найден.") from exc
+        user_id = Reservation.objects.values_list("user_id", flat=True).first()
+        if user_id is None:
+            user, _ = User.objects.get_or_create(username="bench_user")
+            return user
+        return User.objects.get(pk=user_id)
+
+    def _build_url(self, pattern: URLPattern, tour_id: int, reservation: Reservation | None) -> str | None:
+        kwargs = {}
+        for name in pattern.pattern.converters:
+            if name == "pk":
+                if pattern.name.startswith("reservation"):
+                    if reservation is None:
+                        return None
+                    kwargs["pk"] = reservation.pk
+                else:
+                    kwargs["pk"] = tour_id
+            elif name in SAMPLE_KWARGS:
+                kwargs[name] = SAMPLE_KWARGS[name]
+            else:
+                return None
+        return reverse(f"{tour_urls.app_name}:{pattern.name}", kwargs=kwargs)
+
+    def _result_key(self, pattern: URLPattern, results: dict) -> str:
+        key = pattern.name
+        if key in results:
+            key = f"{key}[{','.join(pattern.pattern.converters)}]"
+        return key
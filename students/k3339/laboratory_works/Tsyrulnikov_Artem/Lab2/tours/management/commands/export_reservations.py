@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tours.transfer import FORMATS, export_lines, guess_format, reservation_export_rows
+
+
+class Command(BaseCommand):
+    help = "Выгружает бронирования в CSV или JSONL через серверный курсор, не загружая их в память."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", "-o", help="Файл для выгрузки; по умолчанию stdout.")
+        parser.add_argument("--format", choices=FORMATS, help="По умолчанию определяется по расширению.")
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        fmt = options["format"] or guess_format(output or "", default="jsonl")
+        exported = 0
+
+        def counted(rows):
+            nonlocal exported
+            for row in rows:
+                exported += 1
+                yield row
+
+        started = time.perf_counter()
+        lines = export_lines(counted(reservation_export_rows()), fmt)
+        if output:
+            with open(output, "wb") as target:
+                target.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line.decode(), ending="")
+        elapsed = time.perf_counter() - started
+        self.stderr.write(
+            f"Выгружено бронирований: {exported} за {elapsed:.2f} с ({exported / max(elapsed, 1e-9):.0f} строк/с)."
+        )
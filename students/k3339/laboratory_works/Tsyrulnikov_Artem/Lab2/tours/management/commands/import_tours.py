@@ -0,0 +1,40 @@
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tours.transfer import FORMATS, IMPORT_BATCH_SIZE, ImportRowError, guess_format, import_tours, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Импортирует туры из CSV или JSONL потоково, пачками через bulk_create. "
+        "Фото задаются колонкой image (путь относительно --images-dir) или image_base64."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл с турами или - для stdin.")
+        parser.add_argument("--format", choices=FORMATS, help="По умолчанию определяется по расширению.")
+        parser.add_argument("--images-dir", type=Path, help="По умолчанию каталог файла с турами.")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or guess_format(path)
+        images_dir = options["images_dir"] or (Path.cwd() if path == "-" else Path(path).parent)
+        started = time.perf_counter()
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+        try:
+            imported = import_tours(read_rows(stream, fmt), images_dir, options["batch_size"])
+        except ImportRowError as exc:
+            raise CommandError(f"{exc}; импорт отменён.") from exc
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Импортировано туров: {imported} за {elapsed:.2f} с ({imported / max(elapsed, 1e-9):.0f} строк/с)."
+            )
+        )
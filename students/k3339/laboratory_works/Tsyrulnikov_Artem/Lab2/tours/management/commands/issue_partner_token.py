@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tours.partners import issue_token
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Выпускает токен партнёрского API для пользователя; ключ показывается один раз."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("--name", default="partner", help="Подпись токена, например имя партнёра.")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options["username"]).first()
+        if user is None:
+            raise CommandError(f"Пользователь {options['username']} не найден.")
+        if not user.has_perm("tours.add_reservation"):
+            self.stderr.write(self.style.WARNING("У пользователя нет права tours.add_reservation, API ответит 403."))
+        self.stdout.write(issue_token(user, options["name"]))
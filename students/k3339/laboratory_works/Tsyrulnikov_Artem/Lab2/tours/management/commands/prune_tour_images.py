@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tours.models import Tour
+from tours.storage import stored_files
+
+
+class Command(BaseCommand):
+    help = "Удаляет из хранилища фото, на которые не ссылается ни один тур."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age", type=float, default=24, help="Не трогать файлы моложе стольких часов (идущие загрузки)."
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        referenced = set(Tour.objects.exclude(image_hash="").values_list("image_hash", flat=True).distinct())
+        cutoff = time.time() - options["min_age"] * 3600
+        removed = freed = 0
+        for digest, path in stored_files():
+            if digest in referenced or path.stat().st_mtime > cutoff:
+                continue
+            removed += 1
+            freed += path.stat().st_size
+            if not options["dry_run"]:
+                path.unlink()
+        verb = "Будет удалено" if options["dry_run"] else "Удалено"
+        self.stdout.write(self.style.SUCCESS(f"{verb} файлов: {removed} ({freed / 1024 / 1024:.1f} МБ)."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tours.sales import rebuild_sales_summary
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает сводку продаж по странам и дням из подтверждённых бронирований."
+
+    def handle(self, *args, **options):
+        rows = rebuild_sales_summary()
+        self.stdout.write(self.style.SUCCESS(f"Сводка продаж пересчитана: {rows} строк."))
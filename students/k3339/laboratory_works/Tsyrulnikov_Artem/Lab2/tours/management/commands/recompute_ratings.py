@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tours.ratings import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает число отзывов и средний рейтинг туров, если они разошлись с таблицей отзывов."
+
+    def handle(self, *args, **options):
+        fixed = recompute_ratings()
+        self.stdout.write(self.style.SUCCESS(f"Рейтинг пересчитан у туров: {fixed}."))
@@ -0,0 +1,160 @@
+import random
+import time
+from datetime import date, timedelta
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from PIL import Image
+
+from tours.models import Reservation, Review, Tour
+from tours.ratings import recompute_ratings
+from tours.sales import rebuild_sales_summary
+
+User = get_user_model()
+
+COUNTRIES = ["Турция", "Египет", "Италия", "Греция", "Испания", "Таиланд", "ОАЭ", "Грузия", "Вьетнам", "Кипр"]
+AGENCIES = ["Солнце", "Пегас", "Анекс", "Библио-Глобус", "Coral", "TUI"]
+PALETTE = ["#1e88e5", "#43a047", "#fb8c00", "#8e24aa", "#e53935", "#00897b", "#6d4c41", "#3949ab"]
+SEED_USER_PREFIX = "seed_user_"
+
+
+class Command(BaseCommand):
+    help = "Заполняет базу синтетическими турами, бронированиями и отзывами для нагрузочных замеров."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tours", type=int, default=10_000)
+        parser.add_argument("--users", type=int, default=2_000)
+        parser.add_argument("--reservations", type=int, default=1_000_000)
+        parser.add_argument("--reviews", type=int, default=500_000)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument("--no-images", action="store_true", help="Не генерировать фото туров.")
+        parser.add_argument(
+            "--capacity-share", type=float, default=0.5, help="Доля туров с ограниченным числом мест."
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        started = time.perf_counter()
+
+        users = self._create_users(options["users"])
+        tours = self._create_tours(
+            options["tours"], with_images=not options["no_images"], capacity_share=options["capacity_share"]
+        )
+        self._create_reservations(options["reservations"], users, tours)
+        self._create_reviews(options["reviews"], users, tours)
+        rebuild_sales_summary()
+        recompute_ratings()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Готово за {elapsed:.1f} с."))
+
+    def _bulk_create(self, model, objects, total: int, keep: bool = True) -> list:
+        # Only users and tours are kept for their ids; reservations and reviews are dropped
+        # batch by batch so a million rows never sit in memory at once.
+        created = []
+        done = 0
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                done = self._flush(model, batch, done, total, created if keep else None)
+                batch = []
+        if batch:
+            self._flush(model, batch, done, total, created if keep else None)
+        return created
+
+    def _flush(self, model, batch: list, done: int, total: int, created: list | None) -> int:
+        with transaction.atomic():
+            objects = model.objects.bulk_create(batch)
+        if created is not None:
+            created.extend(objects)
+        done += len(batch)
+        self.stdout.write(f"{model.__name__}: {done}/{total}")
+        return done
+
+    def _create_users(self, count: int) -> list[int]:
+        password = make_password("seed-password")
+        offset = User.objects.filter(username__startswith=SEED_USER_PREFIX).count()
+        users = (
+            User(username=f"{SEED_USER_PREFIX}{offset + i}", password=password)
+            for i in range(count)
+        )
+        return [user.pk for user in self._bulk_create(User, users, count)]
+
+    def _sample_images(self) -> list[Tour]:
+        samples = []
+        for color in PALETTE:
+            buffer = BytesIO()
+            Image.new("RGB", (1600, 1000), color).save(buffer, "JPEG", quality=85)
+            sample = Tour()
+            sample.set_image(buffer.getvalue())
+            samples.append(sample)
+        return samples
+
+    def _create_tours(self, count: int, with_images: bool, capacity_share: float) -> list[Tour]:
+        samples = self._sample_images() if with_images else []
+        today = date.today()
+
+        def generate():
+            for i in range(count):
+                start = today + timedelta(days=self.rng.randint(-365, 365))
+                tour = Tour(
+                    name=f"Тур №{i + 1}",
+                    agency=self.rng.choice(AGENCIES),
+                    description="Синтетический тур для нагрузочного тестирования. " * 5,
+                    country=self.rng.choice(COUNTRIES),
+                    start_date=start,
+                    end_date=start + timedelta(days=self.rng.randint(3, 21)),
+                    payment_terms="Предоплата 30%, остаток за 14 дней до вылета.",
+                    capacity=self.rng.randint(4, 40) if self.rng.random() < capacity_share else None,
+                )
+                if samples:
+                    sample = self.rng.choice(samples)
+                    tour.image_mime = sample.image_mime
+                    tour.image_hash = sample.image_hash
+                yield tour
+
+        return self._bulk_create(Tour, generate(), count)
+
+    def _create_reservations(self, count: int, users: list[int], tours: list[Tour]) -> None:
+        if not users or not tours:
+            return
+        count = min(count, len(users) * len(tours))
+        statuses = [Reservation.PENDING, Reservation.CONFIRMED, Reservation.CANCELLED]
+
+        def generate():
+            for i in range(count):
+                tour = tours[(i // len(users)) % len(tours)]
+                yield Reservation(
+                    user_id=users[i % len(users)],
+                    tour_id=tour.pk,
+                    guests=self.rng.randint(1, 4),
+                    travel_start=tour.start_date,
+                    travel_end=tour.end_date,
+                    status=self.rng.choices(statuses, weights=[2, 6, 1])[0],
+                )
+
+        self._bulk_create(Reservation, generate(), count, keep=False)
+
+    def _create_reviews(self, count: int, users: list[int], tours: list[Tour]) -> None:
+        if not users or not tours:
+            return
+
+        def generate():
+            for _ in range(count):
+                tour = self.rng.choice(tours)
+                yield Review(
+                    tour_id=tour.pk,
+                    author_id=self.rng.choice(users),
+                    tour_start=tour.start_date,
+                    tour_end=tour.end_date,
+                    text="Отличная поездка, всё понравилось.",
+                    rating=self.rng.randint(1, 10),
+                )
+
+        self._bulk_create(Review, generate(), count, keep=False)
@@ -0,0 +1,102 @@
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Sum
+
+from tours.capacity import SoldOut
+from tours.models import Reservation, Tour, TourSlot
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Имитирует всплеск одновременных бронирований одного тура и проверяет, что нет овербукинга."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--capacity", type=int, default=50)
+        parser.add_argument("--attempts", type=int, default=300)
+        parser.add_argument("--workers", type=int, default=50)
+        parser.add_argument("--guests", type=int, default=1)
+        parser.add_argument("--keep", action="store_true", help="Не удалять тестовые данные.")
+
+    def handle(self, *args, **options):
+        start = date.today() + timedelta(days=30)
+        end = start + timedelta(days=7)
+        tag = uuid.uuid4().hex[:8]
+        tour = Tour.objects.create(
+            name=f"Стресс-тест {tag}",
+            agency="stress",
+            description="Временный тур для проверки конкурентных бронирований.",
+            country="Тест",
+            start_date=start,
+            end_date=end,
+            payment_terms="-",
+            capacity=options["capacity"],
+        )
+        users = User.objects.bulk_create(
+            [User(username=f"stress_{tag}_{i}") for i in range(options["attempts"])]
+        )
+        go = threading.Event()
+
+        def book(user_id: int) -> str:
+            go.wait()
+            try:
+                with transaction.atomic():
+                    Reservation(
+                        user_id=user_id,
+                        tour=tour,
+                        guests=options["guests"],
+                        travel_start=start,
+                        travel_end=end,
+                    ).save()
+                return "booked"
+            except SoldOut:
+                return "sold_out"
+            except DatabaseError as exc:
+                return "deadlock" if "deadlock" in str(exc).lower() else "db_error"
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = [pool.submit(book, user.pk) for user in users]
+            go.set()
+            outcomes = Counter(future.result() for future in futures)
+        elapsed = time.perf_counter() - started
+
+        booked = (
+            Reservation.objects.filter(tour=tour)
+            .exclude(status=Reservation.CANCELLED)
+            .aggregate(total=Sum("guests"))["total"]
+            or 0
+        )
+        remaining = TourSlot.objects.filter(tour=tour).values_list("remaining", flat=True).first()
+        self.stdout.write(
+            f"{options['attempts']} попыток за {elapsed:.2f} с: {dict(outcomes)}; "
+            f"занято мест {booked}/{options['capacity']}, остаток в слоте {remaining}"
+        )
+
+        problems = []
+        if booked > options["capacity"]:
+            problems.append("продано больше мест, чем есть")
+        if remaining is not None and remaining != options["capacity"] - booked:
+            problems.append("остаток в слоте расходится с бронированиями")
+        if outcomes["booked"] * options["guests"] != booked:
+            problems.append("число успешных бронирований не совпадает с занятыми местами")
+        if outcomes["deadlock"]:
+            problems.append(f"взаимоблокировок: {outcomes['deadlock']}")
+
+        if not options["keep"]:
+            tour.delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+        if problems:
+            raise CommandError("; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("Овербукинга и взаимоблокировок нет."))
@@ -0,0 +1,20 @@
+import sqlite3
+from contextlib import closing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = "Копирует SQLite-базу primary во все SQLite-реплики (локальная замена репликации)."
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if primary["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("Команда нужна только для локального режима TOURAGENCY_DB=sqlite.")
+        with closing(sqlite3.connect(primary["NAME"])) as source:
+            for alias in settings.DATABASE_REPLICAS:
+                with closing(sqlite3.connect(settings.DATABASES[alias]["NAME"])) as target:
+                    source.backup(target)
+                self.stdout.write(self.style.SUCCESS(f"{alias} синхронизирована с {DEFAULT_DB_ALIAS}."))
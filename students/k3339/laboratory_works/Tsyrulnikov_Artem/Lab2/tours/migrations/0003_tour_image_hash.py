@@ -0,0 +1,26 @@
+import hashlib
+
+from django.db import migrations, models
+
+
+def fill_image_hash(apps, schema_editor):
+    Tour = apps.get_model("tours", "Tour")
+    for tour in Tour.objects.exclude(image=None).only("id", "image").iterator(chunk_size=50):
+        if tour.image:
+            image_hash = hashlib.sha256(bytes(tour.image)).hexdigest()
+            Tour.objects.filter(pk=tour.pk).update(image_hash=image_hash)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0002_tour_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tour",
+            name="image_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.RunPython(fill_image_hash, migrations.RunPython.noop),
+    ]
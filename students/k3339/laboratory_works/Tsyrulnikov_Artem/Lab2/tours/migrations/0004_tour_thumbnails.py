@@ -0,0 +1,56 @@
+from io import BytesIO
+
+from django.db import migrations, models
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Frozen copy of tours.images as of this migration.
+
+THUMBNAIL_SIZES = {
+    "card": (640, 400),
+    "preview": (200, 200),
+}
+
+
+def make_thumbnail(data, size):
+    try:
+        with Image.open(BytesIO(data)) as original:
+            image = ImageOps.exif_transpose(original)
+            image.thumbnail(size)
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            out = BytesIO()
+            image.save(out, "JPEG", quality=82, optimize=True, progressive=True)
+    except (UnidentifiedImageError, OSError):
+        return None
+    return out.getvalue()
+
+
+def build_thumbnails(apps, schema_editor):
+    Tour = apps.get_model("tours", "Tour")
+    for tour in Tour.objects.exclude(image=None).only("id", "image").iterator(chunk_size=50):
+        if tour.image:
+            data = bytes(tour.image)
+            Tour.objects.filter(pk=tour.pk).update(
+                card_thumbnail=make_thumbnail(data, THUMBNAIL_SIZES["card"]),
+                preview_thumbnail=make_thumbnail(data, THUMBNAIL_SIZES["preview"]),
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0003_tour_image_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tour",
+            name="card_thumbnail",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="tour",
+            name="preview_thumbnail",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(build_thumbnails, migrations.RunPython.noop),
+    ]
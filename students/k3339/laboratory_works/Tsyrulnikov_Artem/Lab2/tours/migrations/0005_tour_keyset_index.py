@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0004_tour_thumbnails"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="tour",
+            options={"ordering": ["start_date", "id"]},
+        ),
+        migrations.AddIndex(
+            model_name="tour",
+            index=models.Index(fields=["start_date", "id"], name="tour_start_date_id_idx"),
+        ),
+    ]
@@ -0,0 +1,14 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0005_tour_keyset_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(fields=["tour", "-created_at", "-id"], name="review_tour_recent_idx"),
+        ),
+    ]
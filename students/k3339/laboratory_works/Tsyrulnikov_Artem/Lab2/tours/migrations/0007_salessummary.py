@@ -0,0 +1,47 @@
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_sales_summary(apps, schema_editor):
+    Reservation = apps.get_model("tours", "Reservation")
+    SalesSummary = apps.get_model("tours", "SalesSummary")
+    totals = {}
+    confirmed = Reservation.objects.filter(status="confirmed").values_list(
+        "tour__country", "reserved_at", "guests"
+    )
+    for country, reserved_at, guests in confirmed.iterator(chunk_size=5000):
+        key = (country, timezone.localdate(reserved_at))
+        count, guests_total = totals.get(key, (0, 0))
+        totals[key] = (count + 1, guests_total + guests)
+    SalesSummary.objects.bulk_create(
+        [
+            SalesSummary(country=country, day=day, confirmed_count=count, guests_total=guests_total)
+            for (country, day), (count, guests_total) in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0006_review_tour_recent_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SalesSummary",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("country", models.CharField(max_length=80)),
+                ("day", models.DateField()),
+                ("confirmed_count", models.IntegerField(default=0)),
+                ("guests_total", models.IntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["country", "day"],
+                "indexes": [models.Index(fields=["day", "country"], name="sales_day_country_idx")],
+                "unique_together": {("country", "day")},
+            },
+        ),
+        migrations.RunPython(backfill_sales_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    """
+    CREATE FUNCTION tours_tour_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(NEW.country, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(NEW.agency, '')), 'B') ||
+            setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER tours_tour_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, agency, country, description ON tours_tour
+    FOR EACH ROW EXECUTE FUNCTION tours_tour_search_vector_update()
+    """,
+    "UPDATE tours_tour SET name = name",
+    "CREATE INDEX tour_search_vector_gin ON tours_tour USING gin (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS tour_search_vector_gin",
+    "DROP TRIGGER IF EXISTS tours_tour_search_vector_trigger ON tours_tour",
+    "DROP FUNCTION IF EXISTS tours_tour_search_vector_update()",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE tours_tour_fts USING fts5(
+        name, agency, country, description,
+        content='tours_tour', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER tours_tour_fts_insert AFTER INSERT ON tours_tour BEGIN
+        INSERT INTO tours_tour_fts(rowid, name, agency, country, description)
+        VALUES (new.id, new.name, new.agency, new.country, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER tours_tour_fts_delete AFTER DELETE ON tours_tour BEGIN
+        INSERT INTO tours_tour_fts(tours_tour_fts, rowid, name, agency, country, description)
+        VALUES ('delete', old.id, old.name, old.agency, old.country, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER tours_tour_fts_update AFTER UPDATE OF name, agency, country, description ON tours_tour BEGIN
+        INSERT INTO tours_tour_fts(tours_tour_fts, rowid, name, agency, country, description)
+        VALUES ('delete', old.id, old.name, old.agency, old.country, old.description);
+        INSERT INTO tours_tour_fts(rowid, name, agency, country, description)
+        VALUES (new.id, new.name, new.agency, new.country, new.description);
+    END
+    """,
+    "INSERT INTO tours_tour_fts(tours_tour_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS tours_tour_fts_update",
+    "DROP TRIGGER IF EXISTS tours_tour_fts_delete",
+    "DROP TRIGGER IF EXISTS tours_tour_fts_insert",
+    "DROP TABLE IF EXISTS tours_tour_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0007_salessummary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tour",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": POSTGRES_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0008_tour_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tour",
+            name="capacity",
+            field=models.PositiveIntegerField(
+                blank=True, help_text="Мест на один заезд; пусто — без ограничений.", null=True
+            ),
+        ),
+        migrations.CreateModel(
+            name="TourSlot",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("travel_start", models.DateField()),
+                ("travel_end", models.DateField()),
+                ("remaining", models.IntegerField()),
+                (
+                    "tour",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="slots", to="tours.tour"
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("tour", "travel_start", "travel_end")},
+            },
+        ),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(fields=["tour", "travel_start", "travel_end"], name="reservation_tour_dates_idx"),
+        ),
+    ]
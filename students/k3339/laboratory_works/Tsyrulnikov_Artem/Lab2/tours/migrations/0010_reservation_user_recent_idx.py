@@ -0,0 +1,14 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0009_tour_capacity"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(fields=["user", "-reserved_at", "-id"], name="reservation_user_recent_idx"),
+        ),
+    ]
@@ -0,0 +1,14 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0010_reservation_user_recent_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="tour",
+            index=models.Index(fields=["country"], name="tour_country_idx"),
+        ),
+    ]
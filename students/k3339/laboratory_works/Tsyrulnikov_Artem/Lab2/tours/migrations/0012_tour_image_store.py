@@ -0,0 +1,100 @@
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.db import migrations
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Frozen copies of the tours.storage / tours.images helpers as of this migration, so later changes
+# to the store layout do not change what the migration does.
+
+THUMBNAIL_SIZES = {
+    "card": (640, 400),
+    "preview": (200, 200),
+}
+
+
+def image_path(digest, variant="original"):
+    name = digest if variant == "original" else f"{digest}.{variant}.jpg"
+    return Path(settings.TOUR_IMAGE_ROOT) / digest[:2] / digest[2:4] / name
+
+
+def _publish(data, target):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent)
+    with os.fdopen(fd, "wb") as out:
+        out.write(data)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, target)
+
+
+def _detect_mime(data):
+    try:
+        with Image.open(BytesIO(data)) as image:
+            return image.get_format_mimetype()
+    except (UnidentifiedImageError, OSError):
+        return None
+
+
+def _make_thumbnail(data, size):
+    try:
+        with Image.open(BytesIO(data)) as original:
+            image = ImageOps.exif_transpose(original)
+            image.thumbnail(size)
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            out = BytesIO()
+            image.save(out, "JPEG", quality=82, optimize=True, progressive=True)
+    except (UnidentifiedImageError, OSError):
+        return None
+    return out.getvalue()
+
+
+def store_image(data, mime):
+    digest = hashlib.sha256(data).hexdigest()
+    if not image_path(digest).exists():
+        _publish(data, image_path(digest))
+    for variant, size in THUMBNAIL_SIZES.items():
+        target = image_path(digest, variant)
+        if not target.exists() and (thumbnail := _make_thumbnail(data, size)) is not None:
+            _publish(thumbnail, target)
+    return digest, _detect_mime(data) or mime or "application/octet-stream"
+
+
+def move_images_to_store(apps, schema_editor):
+    Tour = apps.get_model("tours", "Tour")
+    for pk in list(Tour.objects.exclude(image=None).values_list("pk", flat=True)):
+        tour = Tour.objects.only("id", "image", "image_mime").get(pk=pk)
+        if tour.image:
+            # Photos already accepted into the table are kept whatever the current limits are.
+            digest, mime = store_image(bytes(tour.image), tour.image_mime)
+            Tour.objects.filter(pk=pk).update(image_hash=digest, image_mime=mime)
+
+
+def load_images_from_store(apps, schema_editor):
+    Tour = apps.get_model("tours", "Tour")
+    for tour in Tour.objects.exclude(image_hash="").only("id", "image_hash").iterator(chunk_size=50):
+        files = {
+            "image": image_path(tour.image_hash),
+            "card_thumbnail": image_path(tour.image_hash, "card"),
+            "preview_thumbnail": image_path(tour.image_hash, "preview"),
+        }
+        Tour.objects.filter(pk=tour.pk).update(
+            **{field: path.read_bytes() if path.exists() else None for field, path in files.items()}
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0011_tour_country_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(move_images_to_store, load_images_from_store),
+        migrations.RemoveField(model_name="tour", name="image"),
+        migrations.RemoveField(model_name="tour", name="card_thumbnail"),
+        migrations.RemoveField(model_name="tour", name="preview_thumbnail"),
+    ]
@@ -0,0 +1,65 @@
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce
+
+search_migration = import_module("tours.migrations.0008_tour_search")
+
+
+def restore_sqlite_search_triggers(apps, schema_editor):
+    # Adding NOT NULL columns rebuilds tours_tour on SQLite, which drops the FTS triggers from 0008.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in [*search_migration.SQLITE_BACKWARD[:3], *search_migration.SQLITE_FORWARD[1:]]:
+        schema_editor.execute(statement)
+
+
+def fill_ratings(apps, schema_editor):
+    Tour = apps.get_model("tours", "Tour")
+    Review = apps.get_model("tours", "Review")
+    reviews = Review.objects.filter(tour=OuterRef("pk")).order_by().values("tour")
+    Tour.objects.update(
+        review_count=Coalesce(Subquery(reviews.annotate(value=Count("id")).values("value")), 0),
+        rating_sum=Coalesce(Subquery(reviews.annotate(value=Sum("rating")).values("value")), 0),
+    )
+    Tour.objects.filter(review_count__gt=0).update(
+        avg_rating=Cast(F("rating_sum"), FloatField()) / Cast(F("review_count"), FloatField())
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0012_tour_image_store"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_sqlite_search_triggers),
+        migrations.AddField(
+            model_name="tour",
+            name="review_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="tour",
+            name="rating_sum",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="tour",
+            name="avg_rating",
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+        migrations.RunPython(restore_sqlite_search_triggers, migrations.RunPython.noop),
+        # The country-leading rating index also serves the country filter on its own.
+        migrations.RemoveIndex(model_name="tour", name="tour_country_idx"),
+        migrations.AddIndex(
+            model_name="tour",
+            index=models.Index(fields=["-avg_rating", "id"], name="tour_rating_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="tour",
+            index=models.Index(fields=["country", "-avg_rating", "id"], name="tour_country_rating_idx"),
+        ),
+    ]
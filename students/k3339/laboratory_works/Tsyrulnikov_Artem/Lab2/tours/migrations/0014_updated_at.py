@@ -0,0 +1,37 @@
+from importlib import import_module
+
+import django.utils.timezone
+from django.db import migrations, models
+
+restore_sqlite_search_triggers = import_module("tours.migrations.0013_tour_ratings").restore_sqlite_search_triggers
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0013_tour_ratings"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_sqlite_search_triggers),
+        migrations.AddField(
+            model_name="tour",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(restore_sqlite_search_triggers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="tour",
+            index=models.Index(fields=["updated_at"], name="tour_updated_at_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(fields=["tour", "updated_at"], name="review_tour_updated_idx"),
+        ),
+    ]
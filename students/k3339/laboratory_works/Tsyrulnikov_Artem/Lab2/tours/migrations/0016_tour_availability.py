@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+POSTGRES_FORWARD = [
+    "CREATE INDEX tour_period_gist ON tours_tour USING gist (daterange(start_date, end_date, '[]'))",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS tour_period_gist",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0015_reservationevent"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="tour",
+            index=models.Index(fields=["start_date", "end_date"], name="tour_period_idx"),
+        ),
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD}),
+            _run({"postgresql": POSTGRES_BACKWARD}),
+        ),
+    ]
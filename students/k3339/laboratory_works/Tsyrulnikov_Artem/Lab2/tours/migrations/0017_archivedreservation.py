@@ -0,0 +1,50 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0016_tour_availability"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedReservation",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("guests", models.PositiveSmallIntegerField()),
+                ("travel_start", models.DateField()),
+                ("travel_end", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "В ожидании"), ("confirmed", "Подтверждено"), ("cancelled", "Отменено")],
+                        max_length=12,
+                    ),
+                ),
+                ("reserved_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "tour",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="+", to="tours.tour"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="+", to=settings.AUTH_USER_MODEL
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-reserved_at"],
+                "indexes": [
+                    models.Index(fields=["user", "-reserved_at", "-id"], name="archived_user_recent_idx"),
+                ],
+            },
+        ),
+    ]
@@ -1,11 +1,25 @@
-import base64
+from pathlib import Path
 
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.urls import reverse
 from django.utils import timezone
 
+from .images import THUMBNAIL_MIME
+from .storage import image_path, store_image
+
 User = get_user_model()
 
+HEAVY_FIELDS = ("search_vector",)
+# Maintained with F() updates from the Review signals (tours.ratings), never written by Tour.save().
+RATING_FIELDS = ("review_count", "rating_sum", "avg_rating")
+
+
+class TourQuerySet(models.QuerySet):
+    def without_blobs(self):
+        return self.defer(*HEAVY_FIELDS)
+
 
 class Tour(models.Model):
     name = models.CharField(max_length=120)
@@ -15,22 +29,99 @@ class Tour(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
     payment_terms = models.TextField()
-    image = models.BinaryField(blank=True, null=True)
+    capacity = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Мест на один заезд; пусто — без ограничений."
+    )
+    # The photo itself is in the content-addressed store (tours.storage), keyed by its SHA-256.
     image_mime = models.CharField(max_length=40, blank=True)
+    image_hash = models.CharField(max_length=64, blank=True)
+    review_count = models.IntegerField(default=0, editable=False)
+    rating_sum = models.IntegerField(default=0, editable=False)
+    avg_rating = models.FloatField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Filled by a database trigger (tsvector on Postgres, an FTS5 table on SQLite), see 0008_tour_search.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = TourQuerySet.as_manager()
 
     class Meta:
-        ordering = ["start_date"]
+        ordering = ["start_date", "id"]
+        indexes = [
+            models.Index(fields=["start_date", "id"], name="tour_start_date_id_idx"),
+            # Availability windows on SQLite; Postgres also has tour_period_gist, see tours.availability.
+            models.Index(fields=["start_date", "end_date"], name="tour_period_idx"),
+            models.Index(fields=["-avg_rating", "id"], name="tour_rating_idx"),
+            models.Index(fields=["country", "-avg_rating", "id"], name="tour_country_rating_idx"),
+            models.Index(fields=["updated_at"], name="tour_updated_at_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name} ({self.country})"
 
-    @property
-    def image_data_url(self) -> str | None:
-        if self.image and self.image_mime:
-            encoded = base64.b64encode(self.image).decode("ascii")
-            return f"data:{self.image_mime};base64,{encoded}"
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in RATING_FIELDS and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+    def set_image(self, source) -> None:
+        if source:
+            self.image_hash, self.image_mime = store_image(source)
+        else:
+            self.image_hash = ""
+            self.image_mime = ""
+
+    def image_file(self, variant: str) -> tuple[Path | None, str]:
+        if not self.image_hash:
+            return None, ""
+        if variant != "original":
+            thumbnail = image_path(self.image_hash, variant)
+            if thumbnail.exists():
+                return thumbnail, THUMBNAIL_MIME
+        original = image_path(self.image_hash)
+        return (original if original.exists() else None), self.image_mime
+
+    def _image_variant_url(self, variant: str) -> str | None:
+        if self.image_hash:
+            args = [self.pk] if variant == "original" else [self.pk, variant]
+            url = reverse("tours:image", args=args)
+            return f"{url}?v={self.image_hash[:16]}"
         return None
 
+    @property
+    def image_url(self) -> str | None:
+        return self._image_variant_url("original")
+
+    @property
+    def card_image_url(self) -> str | None:
+        return self._image_variant_url("card")
+
+    @property
+    def preview_image_url(self) -> str | None:
+        return self._image_variant_url("preview")
+
+
+class ReservationQuerySet(models.QuerySet):
+    def with_tour(self):
+        return self.select_related("tour").defer(*(f"tour__{field}" for field in HEAVY_FIELDS))
+
+
+class TourSlot(models.Model):
+    tour = models.ForeignKey(Tour, on_delete=models.CASCADE, related_name="slots")
+    travel_start = models.DateField()
+    travel_end = models.DateField()
+    remaining = models.IntegerField()
+
+    class Meta:
+        unique_together = ("tour", "travel_start", "travel_end")
+
+    def __str__(self) -> str:
+        return f"{self.tour_id}: {self.travel_start} — {self.travel_end} ({self.remaining})"
+
 
 class Reservation(models.Model):
     PENDING = "pending"
@@ -50,14 +141,80 @@ class Reservation(models.Model):
     status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=PENDING)
     reserved_at = models.DateTimeField(default=timezone.now)
 
+    objects = ReservationQuerySet.as_manager()
+
     class Meta:
         unique_together = ("user", "tour", "travel_start", "travel_end")
         ordering = ["-reserved_at"]
+        indexes = [
+            models.Index(fields=["user", "-reserved_at", "-id"], name="reservation_user_recent_idx"),
+            models.Index(fields=["tour", "travel_start", "travel_end"], name="reservation_tour_dates_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user} → {self.tour}"
 
 
+class ArchivedReservation(models.Model):
+    # Cold copy of Reservation rows moved out by the archive_reservations command; the id is kept,
+    # so the audit history (ReservationEvent) still lines up.
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    tour = models.ForeignKey(Tour, on_delete=models.CASCADE, related_name="+")
+    guests = models.PositiveSmallIntegerField()
+    travel_start = models.DateField()
+    travel_end = models.DateField()
+    status = models.CharField(max_length=12, choices=Reservation.STATUS_CHOICES)
+    reserved_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-reserved_at"]
+        indexes = [
+            models.Index(fields=["user", "-reserved_at", "-id"], name="archived_user_recent_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user} → {self.tour} (архив)"
+
+
+class ReservationEvent(models.Model):
+    DELETED = "deleted"
+    STATUS_CHOICES = [*Reservation.STATUS_CHOICES, (DELETED, "Удалено")]
+
+    # A plain id rather than a foreign key: the history outlives deleted reservations.
+    reservation_id = models.BigIntegerField()
+    old_status = models.CharField(max_length=12, choices=STATUS_CHOICES, blank=True)
+    new_status = models.CharField(max_length=12, choices=STATUS_CHOICES)
+    source = models.CharField(max_length=20)
+    actor = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["reservation_id", "-created_at", "-id"], name="reservation_event_recent_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"#{self.reservation_id}: {self.old_status or '—'} → {self.new_status}"
+
+
+class PartnerToken(models.Model):
+    # Credential for server-to-server calls to the partner API (tours.partners); only the
+    # SHA-256 of the key is stored, the key itself is shown once by issue_partner_token.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="partner_tokens")
+    name = models.CharField(max_length=80)
+    key_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.user} / {self.name}"
+
+
 class Review(models.Model):
     tour = models.ForeignKey(Tour, on_delete=models.CASCADE)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -66,9 +223,14 @@ class Review(models.Model):
     text = models.TextField()
     rating = models.PositiveSmallIntegerField()
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["tour", "-created_at", "-id"], name="review_tour_recent_idx"),
+            models.Index(fields=["tour", "updated_at"], name="review_tour_updated_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         if not (1 <= self.rating <= 10):
@@ -77,3 +239,18 @@ class Review(models.Model):
 
     def __str__(self) -> str:
         return f"{self.tour} / {self.rating}"
+
+
+class SalesSummary(models.Model):
+    country = models.CharField(max_length=80)
+    day = models.DateField()
+    confirmed_count = models.IntegerField(default=0)
+    guests_total = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("country", "day")
+        ordering = ["country", "day"]
+        indexes = [models.Index(fields=["day", "country"], name="sales_day_country_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.country} / {self.day}: {self.confirmed_count}"
@@ -0,0 +1,187 @@
+import base64
+import binascii
+import datetime
+import json
+from collections.abc import Mapping, Sequence
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.http import QueryDict
+from django.utils.functional import cached_property
+
+DEFAULT_PAGE_SIZE = 20
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(direction: str, values: Sequence) -> str:
+    payload = json.dumps([direction, [_encode_value(v) for v in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> tuple[str, list] | None:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if direction not in ("next", "prev") or not isinstance(values, list) or len(values) != size:
+        return None
+    return direction, values
+
+
+class KeysetPage:
+    def __init__(self, object_list: list, paginator: "KeysetPaginator", params: Mapping | None,
+                 has_next: bool, has_previous: bool):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.params = params
+        self.has_next = has_next and bool(object_list)
+        self.has_previous = has_previous and bool(object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def has_other_pages(self) -> bool:
+        return self.has_next or self.has_previous
+
+    @property
+    def next_cursor(self) -> str | None:
+        if not self.has_next:
+            return None
+        return encode_cursor("next", self.paginator.key_values(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self) -> str | None:
+        if not self.has_previous:
+            return None
+        return encode_cursor("prev", self.paginator.key_values(self.object_list[0]))
+
+    def _query(self, cursor: str | None) -> str | None:
+        if cursor is None:
+            return None
+        params = QueryDict(mutable=True)
+        if self.params:
+            params.update(self.params)
+        params[self.paginator.cursor_param] = cursor
+        return params.urlencode()
+
+    @property
+    def next_query(self) -> str | None:
+        return self._query(self.next_cursor)
+
+    @property
+    def previous_query(self) -> str | None:
+        return self._query(self.previous_cursor)
+
+
+class KeysetPaginator:
+    cursor_param = "cursor"
+
+    def __init__(self, queryset: QuerySet, keys: Sequence[str], per_page: int = DEFAULT_PAGE_SIZE):
+        self.queryset = queryset
+        self.keys = tuple(keys)
+        self.per_page = per_page
+
+    def key_values(self, item) -> list:
+        fields = [key.lstrip("-") for key in self.keys]
+        if isinstance(item, Mapping):
+            return [item[field] for field in fields]
+        return [getattr(item, field) for field in fields]
+
+    def _seek(self, values: list, backwards: bool) -> Q:
+        fields = [key.lstrip("-") for key in self.keys]
+        descending = [key.startswith("-") for key in self.keys]
+        condition = Q()
+        for i, field in enumerate(fields):
+            lookup = "lt" if descending[i] != backwards else "gt"
+            branch = Q(**{f"{field}__{lookup}": values[i]})
+            for prev_field, prev_value in zip(fields[:i], values[:i]):
+                branch &= Q(**{prev_field: prev_value})
+            condition |= branch
+        # A redundant bound on the leading key keeps the scan on the index range.
+        leading = "lte" if descending[0] != backwards else "gte"
+        return Q(**{f"{fields[0]}__{leading}": values[0]}) & condition
+
+    def _ordering(self, backwards: bool) -> list[str]:
+        if not backwards:
+            return list(self.keys)
+        return [key[1:] if key.startswith("-") else f"-{key}" for key in self.keys]
+
+    def _plan(self, cursor: str | None) -> tuple[QuerySet, bool, list | None]:
+        decoded = decode_cursor(cursor, len(self.keys)) if cursor else None
+        direction, values = decoded if decoded else ("next", None)
+        backwards = direction == "prev"
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, backwards))
+        return queryset.order_by(*self._ordering(backwards))[: self.per_page + 1], backwards, values
+
+    def _build(self, rows: list, backwards: bool, values: list | None, params: Mapping | None) -> KeysetPage:
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if backwards:
+            rows.reverse()
+            return KeysetPage(rows, self, params, has_next=True, has_previous=has_more)
+        return KeysetPage(rows, self, params, has_next=has_more, has_previous=values is not None)
+
+    def page(self, cursor: str | None = None, params: Mapping | None = None) -> KeysetPage:
+        queryset, backwards, values = self._plan(cursor)
+        return self._build(list(queryset), backwards, values, params)
+
+    async def apage(self, cursor: str | None = None, params: Mapping | None = None) -> KeysetPage:
+        queryset, backwards, values = self._plan(cursor)
+        return self._build([row async for row in queryset], backwards, values, params)
+
+
+class KeysetPaginationMixin:
+    keyset: Sequence[str] = ("id",)
+    page_size = DEFAULT_PAGE_SIZE
+
+    def get_keyset_paginator(self, queryset: QuerySet) -> KeysetPaginator:
+        return KeysetPaginator(queryset, self.keyset, self.page_size)
+
+    def get_keyset_page(self, queryset: QuerySet) -> KeysetPage:
+        paginator = self.get_keyset_paginator(queryset)
+        return paginator.page(self.request.GET.get(paginator.cursor_param), self.request.GET)
+
+    async def aget_keyset_page(self, queryset: QuerySet) -> KeysetPage:
+        paginator = self.get_keyset_paginator(queryset)
+        return await paginator.apage(self.request.GET.get(paginator.cursor_param), self.request.GET)
+
+    def get_context_data(self, **kwargs):
+        page = self.get_keyset_page(self.object_list)
+        return super().get_context_data(object_list=page.object_list, page=page, **kwargs)
+
+
+class EstimatedCountPaginator(Paginator):
+    # Above the threshold the planner's row estimate stands in for COUNT(*), which on
+    # Postgres has to visit every matching row. Other backends always count exactly.
+    estimate_threshold = 100_000
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and connections[queryset.db].vendor == "postgresql":
+            estimate = self._planner_estimate(queryset)
+            if estimate >= self.estimate_threshold:
+                return estimate
+        return super().count
+
+    @staticmethod
+    def _planner_estimate(queryset: QuerySet) -> int:
+        sql, params = queryset.order_by().values("pk").query.sql_with_params()
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
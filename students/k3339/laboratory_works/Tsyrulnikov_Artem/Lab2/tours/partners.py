@@ -0,0 +1,32 @@
+import hashlib
+import secrets
+
+from django.http import HttpRequest
+
+from .models import PartnerToken, User
+
+# Partners call the JSON API from their servers with "Authorization: Bearer <key>". The key is
+# not a cookie, so a cross-site page cannot make the browser send it; that is what lets the
+# partner endpoints skip the CSRF check (tours.api.partner_api).
+
+
+def hash_key(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def issue_token(user: User, name: str) -> str:
+    key = secrets.token_urlsafe(32)
+    PartnerToken.objects.create(user=user, name=name, key_hash=hash_key(key))
+    return key
+
+
+def token_user(request: HttpRequest) -> User | None:
+    scheme, _, key = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not key.strip():
+        return None
+    token = (
+        PartnerToken.objects.select_related("user")
+        .filter(key_hash=hash_key(key.strip()), user__is_active=True)
+        .first()
+    )
+    return token.user if token else None
@@ -0,0 +1,68 @@
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Now
+
+from .cache import bump_card_version
+from .models import Review, Tour
+
+
+def rating_delta(before: Iterable[Mapping] = (), after: Iterable[Mapping] = ()) -> dict[int, list[int]]:
+    delta: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+    for rows, sign in ((before, -1), (after, 1)):
+        for row in rows:
+            totals = delta[row["tour_id"]]
+            totals[0] += sign
+            totals[1] += sign * row["rating"]
+    return {tour_id: totals for tour_id, totals in delta.items() if any(totals)}
+
+
+def _average(count, total):
+    return Cast(total, FloatField()) / Cast(count, FloatField())
+
+
+def apply_rating_delta(delta: Mapping[int, list[int]]) -> None:
+    # One UPDATE per tour; the F() expressions read the row as it is when the update runs,
+    # so concurrent reviews of the same tour cannot overwrite each other.
+    for tour_id, (count, total) in sorted(delta.items()):
+        new_count = F("review_count") + count
+        new_sum = F("rating_sum") + total
+        Tour.objects.filter(pk=tour_id).update(
+            updated_at=Now(),
+            review_count=new_count,
+            rating_sum=new_sum,
+            avg_rating=Case(
+                When(review_count__lte=-count, then=Value(0.0)),
+                default=_average(new_count, new_sum),
+                output_field=FloatField(),
+            ),
+        )
+        bump_card_version(tour_id)
+
+
+def recompute_ratings() -> int:
+    reviews = Review.objects.filter(tour=OuterRef("pk")).order_by().values("tour")
+    count = Coalesce(Subquery(reviews.annotate(value=Count("id")).values("value")), 0)
+    total = Coalesce(Subquery(reviews.annotate(value=Sum("rating")).values("value")), 0)
+    drifted = list(
+        Tour.objects.annotate(actual_count=count, actual_sum=total)
+        .filter(~Q(review_count=F("actual_count")) | ~Q(rating_sum=F("actual_sum")))
+        .values_list("pk", flat=True)
+    )
+    if not drifted:
+        return 0
+    with transaction.atomic():
+        tours = Tour.objects.filter(pk__in=drifted)
+        tours.update(review_count=count, rating_sum=total, updated_at=Now())
+        tours.update(
+            avg_rating=Case(
+                When(review_count=0, then=Value(0.0)),
+                default=_average(F("review_count"), F("rating_sum")),
+                output_field=FloatField(),
+            )
+        )
+    for tour_id in drifted:
+        bump_card_version(tour_id)
+    return len(drifted)
@@ -0,0 +1,71 @@
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+from datetime import date, datetime
+from itertools import chain
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ArchivedReservation, Reservation, SalesSummary
+
+SalesKey = tuple[str, date]
+SNAPSHOT_FIELDS = ("status", "guests", "reserved_at", "tour__country")
+
+
+def sales_day(reserved_at: datetime) -> date:
+    return timezone.localdate(reserved_at) if timezone.is_aware(reserved_at) else reserved_at.date()
+
+
+def sales_delta(
+    before: Iterable[Mapping] = (), after: Iterable[Mapping] = ()
+) -> dict[SalesKey, list[int]]:
+    delta: dict[SalesKey, list[int]] = defaultdict(lambda: [0, 0])
+    for rows, sign in ((before, -1), (after, 1)):
+        for row in rows:
+            if row["status"] != Reservation.CONFIRMED:
+                continue
+            totals = delta[(row["tour__country"], sales_day(row["reserved_at"]))]
+            totals[0] += sign
+            totals[1] += sign * row["guests"]
+    return delta
+
+
+def apply_sales_delta(delta: Mapping[SalesKey, list[int]]) -> None:
+    for (country, day), (count, guests) in sorted(delta.items()):
+        if count or guests:
+            _increment(country, day, count, guests)
+
+
+def _increment(country: str, day: date, count: int, guests: int) -> None:
+    rows = SalesSummary.objects.filter(country=country, day=day)
+    changes = {
+        "confirmed_count": F("confirmed_count") + count,
+        "guests_total": F("guests_total") + guests,
+    }
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            SalesSummary.objects.create(country=country, day=day, confirmed_count=count, guests_total=guests)
+    except IntegrityError:
+        rows.update(**changes)
+
+
+def rebuild_sales_summary() -> int:
+    # Archived sales still count; see tours.archive.
+    confirmed = chain.from_iterable(
+        model.objects.filter(status=Reservation.CONFIRMED).values(*SNAPSHOT_FIELDS).iterator(chunk_size=5000)
+        for model in (Reservation, ArchivedReservation)
+    )
+    totals = sales_delta(after=confirmed)
+    with transaction.atomic():
+        SalesSummary.objects.all().delete()
+        SalesSummary.objects.bulk_create(
+            [
+                SalesSummary(country=country, day=day, confirmed_count=count, guests_total=guests)
+                for (country, day), (count, guests) in sorted(totals.items())
+            ],
+            batch_size=1000,
+        )
+    return len(totals)
@@ -0,0 +1,66 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Count, F, FloatField, Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = "russian"
+FTS_TABLE = "tours_tour_fts"
+# bm25 column weights follow the FTS5 column order: name, agency, country, description.
+FTS_RANK = f"-bm25({FTS_TABLE}, 10.0, 4.0, 8.0, 1.0)"
+FTS_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def _vendor(queryset: QuerySet) -> str:
+    return connections[queryset.db].vendor
+
+
+def _fts_query(query: str) -> str:
+    return " ".join(f'"{token}"*' for token in FTS_TOKEN.findall(query))
+
+
+def filter_tours(queryset: QuerySet, query: str) -> QuerySet:
+    query = query.strip()
+    if not query:
+        return queryset
+    vendor = _vendor(queryset)
+    if vendor == "postgresql":
+        return queryset.filter(search_vector=SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch"))
+    if vendor == "sqlite":
+        fts_query = _fts_query(query)
+        if not fts_query:
+            return queryset.none()
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [fts_query])
+        )
+    return queryset.filter(
+        Q(name__icontains=query)
+        | Q(description__icontains=query)
+        | Q(agency__icontains=query)
+        | Q(country__icontains=query)
+    )
+
+
+def rank_tours(queryset: QuerySet, query: str) -> QuerySet:
+    query = query.strip()
+    vendor = _vendor(queryset)
+    if vendor == "postgresql":
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+        return queryset.annotate(rank=SearchRank(F("search_vector"), search_query))
+    if vendor == "sqlite" and _fts_query(query):
+        rank = RawSQL(
+            f"SELECT {FTS_RANK} FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = tours_tour.id",
+            [_fts_query(query)],
+            output_field=FloatField(),
+        )
+        return queryset.annotate(rank=rank)
+    return queryset.annotate(rank=RawSQL("0", [], output_field=FloatField()))
+
+
+def country_facet_queryset(queryset: QuerySet) -> QuerySet:
+    return queryset.order_by().values("country").annotate(total=Count("id")).order_by("country")
+
+
+def country_facets(queryset: QuerySet) -> list[dict]:
+    return list(country_facet_queryset(queryset))
@@ -0,0 +1,137 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .audit import record_status_change
+from .cache import bump_card_version, mark_catalog_deleted
+from .capacity import apply_capacity_delta, capacity_delta, resize_slots
+from .live import notify_status_change
+from .models import ArchivedReservation, Reservation, ReservationEvent, Review, Tour
+from .ratings import apply_rating_delta, rating_delta
+from .sales import SNAPSHOT_FIELDS, apply_sales_delta, sales_delta
+
+RESERVATION_STATE_FIELDS = (*SNAPSHOT_FIELDS, "tour_id", "travel_start", "travel_end")
+
+
+def _reservation_snapshot(reservation: Reservation | ArchivedReservation) -> dict:
+    return {
+        "status": reservation.status,
+        "guests": reservation.guests,
+        "reserved_at": reservation.reserved_at,
+        "tour__country": reservation.tour.country,
+        "tour_id": reservation.tour_id,
+        "travel_start": reservation.travel_start,
+        "travel_end": reservation.travel_end,
+    }
+
+
+@receiver(pre_save, sender=Reservation)
+def remember_reservation_state(sender, instance: Reservation, raw=False, **kwargs):
+    instance._state_before = None
+    if raw:
+        return
+    if instance.pk:
+        instance._state_before = (
+            Reservation.objects.filter(pk=instance.pk).values(*RESERVATION_STATE_FIELDS).first()
+        )
+    before = [instance._state_before] if instance._state_before else []
+    # Seats are taken before the row is written; SoldOut aborts the save.
+    apply_capacity_delta(capacity_delta(before, [_reservation_snapshot(instance)]))
+
+
+@receiver(post_save, sender=Reservation)
+def update_sales_on_save(sender, instance: Reservation, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, "_state_before", None)
+    apply_sales_delta(sales_delta([before] if before else [], [_reservation_snapshot(instance)]))
+    if before is None or before["status"] != instance.status:
+        record_status_change(instance.pk, before["status"] if before else "", instance.status)
+        notify_status_change(instance.user_id, instance.pk, instance.status)
+
+
+@receiver(pre_delete, sender=Reservation)
+def release_seats_on_delete(sender, instance: Reservation, **kwargs):
+    apply_capacity_delta(capacity_delta(before=[_reservation_snapshot(instance)]))
+
+
+@receiver(post_delete, sender=Reservation)
+def update_sales_on_delete(sender, instance: Reservation, **kwargs):
+    if instance.status == Reservation.CONFIRMED:
+        apply_sales_delta(sales_delta(before=[_reservation_snapshot(instance)]))
+    record_status_change(instance.pk, instance.status, ReservationEvent.DELETED)
+    notify_status_change(instance.user_id, instance.pk, ReservationEvent.DELETED)
+
+
+@receiver(post_delete, sender=ArchivedReservation)
+def update_sales_on_archive_delete(sender, instance: ArchivedReservation, **kwargs):
+    # Also reached through the cascade when the tour or the user is deleted.
+    if instance.status == Reservation.CONFIRMED:
+        apply_sales_delta(sales_delta(before=[_reservation_snapshot(instance)]))
+
+
+@receiver(pre_save, sender=Tour)
+def remember_tour_state(sender, instance: Tour, raw=False, **kwargs):
+    instance._state_before = None
+    if instance.pk and not raw:
+        instance._state_before = Tour.objects.filter(pk=instance.pk).values("country", "capacity").first()
+
+
+@receiver(post_save, sender=Tour)
+def move_sales_on_country_change(sender, instance: Tour, raw=False, **kwargs):
+    before = getattr(instance, "_state_before", None)
+    if raw or before is None or before["country"] == instance.country:
+        return
+    # Archived sales are still in the summary (see tours.archive), so they move as well.
+    confirmed = [
+        row
+        for model in (Reservation, ArchivedReservation)
+        for row in model.objects.filter(tour=instance, status=Reservation.CONFIRMED).values(
+            "status", "guests", "reserved_at"
+        )
+    ]
+    apply_sales_delta(
+        sales_delta(
+            before=[{**row, "tour__country": before["country"]} for row in confirmed],
+            after=[{**row, "tour__country": instance.country} for row in confirmed],
+        )
+    )
+
+
+@receiver(post_save, sender=Tour)
+def resize_slots_on_capacity_change(sender, instance: Tour, raw=False, **kwargs):
+    before = getattr(instance, "_state_before", None)
+    if raw or before is None or before["capacity"] == instance.capacity:
+        return
+    resize_slots(instance, before["capacity"])
+
+
+@receiver(post_save, sender=Tour)
+@receiver(post_delete, sender=Tour)
+def invalidate_tour_card(sender, instance: Tour, **kwargs):
+    bump_card_version(instance.pk)
+
+
+@receiver(post_delete, sender=Tour)
+def invalidate_catalog_on_delete(sender, instance: Tour, **kwargs):
+    mark_catalog_deleted()
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_state(sender, instance: Review, raw=False, **kwargs):
+    instance._state_before = None
+    if instance.pk and not raw:
+        instance._state_before = Review.objects.filter(pk=instance.pk).values("tour_id", "rating").first()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance: Review, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, "_state_before", None)
+    after = {"tour_id": instance.tour_id, "rating": instance.rating}
+    apply_rating_delta(rating_delta([before] if before else [], [after]))
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance: Review, **kwargs):
+    apply_rating_delta(rating_delta(before=[{"tour_id": instance.tour_id, "rating": instance.rating}]))
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
+
+from .images import THUMBNAIL_SIZES, detect_mime, make_thumbnail
+
+CHUNK_SIZE = 64 * 1024
+
+# Photos live on disk under their SHA-256: <root>/ab/cd/<hash> for the original and
+# <hash>.<variant>.jpg next to it for thumbnails. Equal uploads share one file.
+
+
+TYPE_REJECTED = "Допустимы только изображения JPEG, PNG, WebP и GIF."
+
+
+class ImageRejected(ValueError):
+    pass
+
+
+def _too_large() -> ImageRejected:
+    return ImageRejected(f"Файл больше {filesizeformat(settings.TOUR_IMAGE_MAX_BYTES)}.")
+
+
+def image_root() -> Path:
+    return Path(settings.TOUR_IMAGE_ROOT)
+
+
+def image_path(digest: str, variant: str = "original") -> Path:
+    name = digest if variant == "original" else f"{digest}.{variant}.jpg"
+    return image_root() / digest[:2] / digest[2:4] / name
+
+
+def _chunks(source) -> Iterator[bytes]:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield bytes(source)
+    elif isinstance(source, Path):
+        with source.open("rb") as file:
+            yield from iter(lambda: file.read(CHUNK_SIZE), b"")
+    elif hasattr(source, "chunks"):
+        yield from source.chunks(CHUNK_SIZE)
+    else:
+        yield from iter(lambda: source.read(CHUNK_SIZE), b"")
+
+
+def _publish(tmp: str, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, target)
+
+
+def _write_thumbnails(digest: str) -> None:
+    original = image_path(digest)
+    for variant, size in THUMBNAIL_SIZES.items():
+        target = image_path(digest, variant)
+        if target.exists():
+            continue
+        thumbnail = make_thumbnail(original, size)
+        if thumbnail is None:
+            continue
+        fd, tmp = tempfile.mkstemp(dir=target.parent)
+        with os.fdopen(fd, "wb") as out:
+            out.write(thumbnail)
+        _publish(tmp, target)
+
+
+def check_upload(upload) -> None:
+    # Validation only: nothing is written to the store until the form is saved.
+    if not upload.size:
+        raise ImageRejected("Пустой файл.")
+    if upload.size > settings.TOUR_IMAGE_MAX_BYTES:
+        raise _too_large()
+    upload.seek(0)
+    mime = detect_mime(upload)
+    upload.seek(0)
+    if mime not in settings.TOUR_IMAGE_TYPES:
+        raise ImageRejected(TYPE_REJECTED)
+
+
+def store_image(source, mime: str = "", check_limits: bool = True) -> tuple[str, str]:
+    tmp_dir = image_root() / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=tmp_dir)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in _chunks(source):
+                size += len(chunk)
+                if check_limits and size > settings.TOUR_IMAGE_MAX_BYTES:
+                    raise _too_large()
+                digest.update(chunk)
+                out.write(chunk)
+        if not size:
+            raise ImageRejected("Пустой файл.")
+        detected = detect_mime(Path(tmp))
+        if check_limits and detected not in settings.TOUR_IMAGE_TYPES:
+            raise ImageRejected(TYPE_REJECTED)
+        key = digest.hexdigest()
+        if not image_path(key).exists():
+            _publish(tmp, image_path(key))
+        _write_thumbnails(key)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    return key, detected or mime or "application/octet-stream"
+
+
+def stored_files() -> Iterator[tuple[str, Path]]:
+    for path in image_root().glob("??/??/*"):
+        yield path.name.split(".", 1)[0], path
@@ -0,0 +1,210 @@
+import json
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.db.models import Sum
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from .audit import buffer
+from .models import Reservation, Tour, TourSlot
+from .partners import issue_token
+from .views import SOLD_OUT_MESSAGE
+
+User = get_user_model()
+
+
+def make_tour(**kwargs) -> Tour:
+    start = date.today() + timedelta(days=30)
+    return Tour.objects.create(
+        **{
+            "name": "Тестовый тур",
+            "agency": "test",
+            "description": "Тур для тестов.",
+            "country": "Тест",
+            "start_date": start,
+            "end_date": start + timedelta(days=7),
+            "payment_terms": "-",
+            **kwargs,
+        }
+    )
+
+
+class MyReservationsQueryCountTests(TestCase):
+    # Session, user and one page of reservations with their tours, however many bookings there are.
+    QUERIES = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("traveller", password="secret")
+        cls.tour = make_tour()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def book(self, count: int) -> None:
+        # Signals are not needed for a read-only page, so the rows go in with one INSERT.
+        Reservation.objects.bulk_create(
+            Reservation(
+                user=self.user,
+                tour=self.tour,
+                travel_start=self.tour.start_date + timedelta(days=i),
+                travel_end=self.tour.end_date + timedelta(days=i),
+            )
+            for i in range(count)
+        )
+
+    def assert_page_queries(self, count: int) -> None:
+        self.book(count)
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get(reverse("tours:my_reservations"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.tour.name)
+
+    def test_one_reservation(self):
+        self.assert_page_queries(1)
+
+    def test_fifty_reservations(self):
+        self.assert_page_queries(50)
+
+
+class ApiConditionalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tour = make_tour()
+
+    def assert_revalidates(self, url: str) -> None:
+        etag = self.client.get(url)["ETag"]
+        # Only the cheap validator query runs; the payload is neither loaded nor serialized.
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.tour.name = "Переименованный тур"
+        self.tour.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_tour_list(self):
+        self.assert_revalidates(reverse("tours:api_tour_list"))
+
+    def test_tour_detail(self):
+        self.assert_revalidates(reverse("tours:api_tour_detail", args=[self.tour.pk]))
+
+
+class ReservationDatesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("traveller", password="secret")
+        cls.tour = make_tour(capacity=1)
+
+    def test_posted_dates_are_ignored(self):
+        # Seats are counted per departure; a shifted range must not open a fresh slot.
+        self.client.force_login(self.user)
+        shifted = {
+            "guests": 1,
+            "travel_start": self.tour.start_date + timedelta(days=1),
+            "travel_end": self.tour.end_date + timedelta(days=1),
+        }
+        response = self.client.post(reverse("tours:reserve", args=[self.tour.pk]), shifted)
+        self.assertEqual(response.status_code, 302)
+        reservation = Reservation.objects.get(tour=self.tour)
+        self.assertEqual(
+            (reservation.travel_start, reservation.travel_end), (self.tour.start_date, self.tour.end_date)
+        )
+
+
+class PartnerApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tour = make_tour(capacity=10)
+        cls.traveller = User.objects.create_user("traveller")
+        cls.partner = User.objects.create_user("partner")
+        cls.partner.user_permissions.add(Permission.objects.get(codename="add_reservation"))
+        cls.key = issue_token(cls.partner, "test")
+
+    def setUp(self):
+        # A partner's server has no CSRF cookie; the check stays on as in production.
+        self.client = Client(enforce_csrf_checks=True)
+        self.url = reverse("tours:api_tour_reservations_bulk", args=[self.tour.pk])
+
+    def post(self, **headers):
+        row = {"user": "traveller", "guests": 2, "travel_start": self.tour.start_date, "travel_end": self.tour.end_date}
+        payload = json.dumps({"reservations": [row]}, default=str)
+        return self.client.post(self.url, payload, content_type="application/json", headers=headers)
+
+    def test_token_call_passes_csrf(self):
+        response = self.post(authorization=f"Bearer {self.key}")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Reservation.objects.get(tour=self.tour).user, self.traveller)
+
+    def test_session_is_not_accepted(self):
+        self.client.force_login(self.partner)
+        self.assertEqual(self.post().status_code, 401)
+
+    def test_unknown_token(self):
+        self.assertEqual(self.post(authorization="Bearer wrong").status_code, 401)
+
+    def test_token_without_permission(self):
+        key = issue_token(self.traveller, "test")
+        self.assertEqual(self.post(authorization=f"Bearer {key}").status_code, 403)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    # Hundreds of clients race for a few seats through reserve_tour. Every attempt must end as a
+    # booking or as SoldOut; a deadlock or lock timeout would surface here as a DatabaseError.
+    # It runs on SQLite with a file test database (TOURAGENCY_DB=sqlite) and on PostgreSQL:
+    #   docker compose up -d pg && python manage.py test tours.tests.ConcurrentBookingTests
+    CAPACITY = 5
+    ATTEMPTS = 300
+    WORKERS = 50
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("An in-memory SQLite database cannot be shared by concurrent connections.")
+
+    def tearDown(self):
+        # The audit events of the bookings go to the test database, not to the atexit flush.
+        buffer.flush()
+
+    def test_no_overbooking(self):
+        tour = make_tour(capacity=self.CAPACITY)
+        users = User.objects.bulk_create(User(username=f"rush_{i}") for i in range(self.ATTEMPTS))
+        url = reverse("tours:reserve", args=[tour.pk])
+        data = {"guests": 1}
+        clients = []
+        for user in users:
+            client = Client()
+            client.force_login(user)
+            clients.append(client)
+        go = threading.Event()
+
+        def book(client: Client) -> str:
+            go.wait()
+            try:
+                response = client.post(url, data)
+            except Exception as exc:
+                return type(exc).__name__
+            finally:
+                connection.close()
+            if response.status_code == 302:
+                return "booked"
+            # reserve_tour re-renders the form with this message when SoldOut is raised.
+            return "sold_out" if SOLD_OUT_MESSAGE in response.content.decode() else str(response.status_code)
+
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            futures = [pool.submit(book, client) for client in clients]
+            go.set()
+            outcomes = Counter(future.result() for future in futures)
+
+        self.assertEqual(outcomes, {"booked": self.CAPACITY, "sold_out": self.ATTEMPTS - self.CAPACITY})
+        remaining = TourSlot.objects.get(tour=tour).remaining
+        held = Reservation.objects.filter(tour=tour).aggregate(total=Sum("guests"))["total"]
+        self.assertGreaterEqual(remaining, 0)
+        self.assertEqual(held, self.CAPACITY)
+        self.assertEqual(remaining, 0)
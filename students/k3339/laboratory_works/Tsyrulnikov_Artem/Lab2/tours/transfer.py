@@ -0,0 +1,128 @@
+import base64
+import csv
+import io
+import json
+from collections.abc import Iterable, Iterator
+from datetime import date
+from itertools import islice
+from pathlib import Path
+
+from django.db import transaction
+
+from .api import EXPORT_CHUNK_SIZE, dumps
+from .models import Reservation, Tour
+
+IMPORT_BATCH_SIZE = 500
+FORMATS = ("csv", "jsonl")
+TOUR_IMPORT_FIELDS = ("name", "agency", "description", "country", "payment_terms")
+RESERVATION_EXPORT_FIELDS = (
+    "id",
+    "tour_id",
+    "tour__name",
+    "tour__country",
+    "user__username",
+    "status",
+    "guests",
+    "travel_start",
+    "travel_end",
+    "reserved_at",
+)
+
+
+class ImportRowError(ValueError):
+    def __init__(self, line: int, message: str):
+        super().__init__(f"Строка {line}: {message}")
+
+
+def guess_format(name: str, default: str = "csv") -> str:
+    suffix = Path(name).suffix.lower().lstrip(".")
+    if suffix in ("jsonl", "ndjson"):
+        return "jsonl"
+    return "csv" if suffix == "csv" else default
+
+
+def read_rows(stream: Iterable[str], fmt: str) -> Iterator[tuple[int, dict]]:
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(stream, 1):
+        if line.strip():
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ImportRowError(line_no, "некорректный JSON") from exc
+
+
+def _image_source(row: dict, images_dir: Path | None) -> bytes | Path | None:
+    if row.get("image_base64"):
+        return base64.b64decode(row["image_base64"])
+    if row.get("image"):
+        if images_dir is None:
+            raise ValueError("файлы изображений не поддерживаются, используйте image_base64")
+        path = (images_dir / row["image"]).resolve()
+        if not path.is_relative_to(images_dir.resolve()):
+            raise ValueError(f"путь к изображению вне каталога: {row['image']}")
+        return path
+    return None
+
+
+def build_tour(line: int, row: dict, images_dir: Path | None = None) -> Tour:
+    try:
+        missing = [field for field in (*TOUR_IMPORT_FIELDS, "start_date", "end_date") if not row.get(field)]
+        if missing:
+            raise ValueError(f"не заполнены поля {', '.join(missing)}")
+        tour = Tour(
+            **{field: row[field] for field in TOUR_IMPORT_FIELDS},
+            start_date=date.fromisoformat(str(row["start_date"])),
+            end_date=date.fromisoformat(str(row["end_date"])),
+            capacity=int(row["capacity"]) if row.get("capacity") not in (None, "") else None,
+        )
+        if tour.end_date < tour.start_date:
+            raise ValueError("дата окончания раньше даты начала")
+        tour.set_image(_image_source(row, images_dir))
+    except (ValueError, OSError) as exc:
+        raise ImportRowError(line, str(exc)) from exc
+    return tour
+
+
+def import_tours(
+    rows: Iterable[tuple[int, dict]], images_dir: Path | None = None, batch_size: int = IMPORT_BATCH_SIZE
+) -> int:
+    # bulk_create skips Tour signals: new tours have no cached cards or slots yet,
+    # and the search index is filled by the database triggers.
+    tours = (build_tour(line, row, images_dir) for line, row in rows)
+    imported = 0
+    with transaction.atomic():
+        while batch := list(islice(tours, batch_size)):
+            Tour.objects.bulk_create(batch)
+            imported += len(batch)
+    return imported
+
+
+def reservation_export_rows(queryset=None) -> Iterator[dict]:
+    queryset = Reservation.objects.all() if queryset is None else queryset
+    rows = queryset.order_by("id").values(*RESERVATION_EXPORT_FIELDS)
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row["tour"] = row.pop("tour__name")
+        row["country"] = row.pop("tour__country")
+        row["user"] = row.pop("user__username")
+        yield row
+
+
+def export_lines(rows: Iterable[dict], fmt: str) -> Iterator[bytes]:
+    if fmt == "jsonl":
+        for row in rows:
+            yield dumps(row) + b"\n"
+        return
+    buffer = io.StringIO()
+    writer = None
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row))
+            writer.writeheader()
+        writer.writerow(row)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
@@ -1,20 +1,32 @@
 from django.contrib.auth import views as auth_views
 from django.urls import path
 
-from . import views
+from touragency.db_routing import replica_reads
+
+from . import api, views
 from .forms import LoginForm
 
 app_name = "tours"
 
 urlpatterns = [
-    path("", views.TourListView.as_view(), name="list"),
-    path("tour/<int:pk>/", views.TourDetailView.as_view(), name="detail"),
+    path("", replica_reads(views.TourListView.as_view()), name="list"),
+    path("tour/<int:pk>/", replica_reads(views.TourDetailView.as_view()), name="detail"),
+    path("tour/<int:pk>/image/", views.tour_image, name="image"),
+    path("tour/<int:pk>/image/<slug:variant>/", views.tour_image, name="image"),
     path("tour/<int:pk>/reserve/", views.reserve_tour, name="reserve"),
     path("tour/<int:pk>/review/", views.add_review, name="review"),
+    path("tour/<int:pk>/reviews/", replica_reads(views.tour_reviews), name="reviews"),
     path("reservations/", views.my_reservations, name="my_reservations"),
+    path("reservations/events/", views.reservation_events, name="reservation_events"),
+    path("reservations/archive/", views.archived_reservations, name="archived_reservations"),
     path("reservations/<int:pk>/edit/", views.reservation_update, name="reservation_edit"),
     path("reservations/<int:pk>/delete/", views.reservation_delete, name="reservation_delete"),
-    path("sales/", views.SalesByCountryView.as_view(), name="sales"),
+    path("sales/", replica_reads(views.SalesByCountryView.as_view()), name="sales"),
+    path("api/tours/", replica_reads(api.tour_list), name="api_tour_list"),
+    path("api/tours/export.jsonl", api.tour_export, name="api_tour_export"),
+    path("api/tours/<int:pk>/", replica_reads(api.tour_detail), name="api_tour_detail"),
+    path("api/tours/<int:pk>/reviews/", replica_reads(api.tour_reviews), name="api_tour_reviews"),
+    path("api/tours/<int:pk>/reservations/", api.tour_reservations_bulk, name="api_tour_reservations_bulk"),
     path("register/", views.register, name="register"),
     path(
         "login/",
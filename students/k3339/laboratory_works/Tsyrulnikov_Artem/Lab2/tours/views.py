@@ -1,35 +1,225 @@
+import datetime
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count
-from django.http import HttpRequest, HttpResponse
+from django.contrib.messages import get_messages
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery, Sum
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import condition
 from django.views.generic import DetailView, ListView
 
-from .forms import ReservationForm, ReviewForm, UserRegistrationForm
-from .models import Reservation, Review, Tour
+from .availability import filter_available
+from .cache import attach_card_versions, card_cache_timeout, catalog_deleted_at
+from .capacity import SoldOut
+from .forms import ReservationForm, ReviewForm, SalesFilterForm, TourSearchForm, UserRegistrationForm
+from .images import THUMBNAIL_SIZES
+from .models import ArchivedReservation, Reservation, Review, SalesSummary, Tour
+from .pagination import KeysetPaginationMixin, KeysetPaginator
+from .search import country_facets, filter_tours, rank_tours
+from .storage import image_root
+
+
+class ConditionalPageMixin:
+    # Answers If-None-Match / If-Modified-Since from last_modified() before any context is built.
+    # Anonymous pages may be stored by a shared cache but must be revalidated each time.
+
+    def last_modified(self) -> datetime.datetime | None:
+        # Views override this; None means the page is sent without validators.
+        return None
+
+    def _validators(self) -> tuple[str | None, int | None]:
+        if len(get_messages(self.request)):
+            return None, None
+        modified = self.last_modified()
+        if modified is None:
+            return None, None
+        user = self.request.user
+        parts = [type(self).__name__, modified.isoformat()]
+        if user.is_authenticated:
+            parts += [str(user.pk), self.request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")]
+        etag = hashlib.md5("|".join(parts).encode(), usedforsecurity=False).hexdigest()
+        return f'"{etag}"', int(modified.timestamp())
 
+    def _not_modified(self, request, etag, last_modified):
+        if etag is None:
+            return None
+        return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    def _add_validators(self, request, response, etag, last_modified):
+        if etag is not None:
+            response.headers.setdefault("ETag", etag)
+            response.headers.setdefault("Last-Modified", http_date(last_modified))
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(response, public=True, no_cache=True)
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self._adispatch(request, *args, **kwargs)
+        validators = self._validators() if request.method in ("GET", "HEAD") else (None, None)
+        response = self._not_modified(request, *validators) or super().dispatch(request, *args, **kwargs)
+        return self._add_validators(request, response, *validators)
+
+    async def _adispatch(self, request, *args, **kwargs):
+        # The validators query the database and resolve request.user, so they run in a thread.
+        validators = (
+            await sync_to_async(self._validators)() if request.method in ("GET", "HEAD") else (None, None)
+        )
+        response = self._not_modified(request, *validators) or await super().dispatch(request, *args, **kwargs)
+        return self._add_validators(request, response, *validators)
 
-class TourListView(ListView):
-    model = Tour
+
+AVAILABILITY_FILTERS = ("date_from", "date_to", "guests")
+
+
+class TourListView(ConditionalPageMixin, KeysetPaginationMixin, ListView):
+    queryset = Tour.objects.without_blobs()
     template_name = "tours/tour_list.html"
     context_object_name = "tours"
+    keyset = ("start_date", "id")
+    page_size = 12
+
+    def get_queryset(self):
+        self.search_form = TourSearchForm(self.request.GET or None)
+        self.filters = self.search_form.cleaned_data if self.search_form.is_valid() else {}
+        tours = super().get_queryset()
+        if any(self.filters.get(name) for name in AVAILABILITY_FILTERS):
+            tours = filter_available(
+                tours, self.filters.get("date_from"), self.filters.get("date_to"), self.filters.get("guests") or 1
+            )
+        if self.filters.get("min_rating"):
+            tours = tours.filter(avg_rating__gte=self.filters["min_rating"])
+        if self.filters.get("q"):
+            tours = filter_tours(tours, self.filters["q"])
+        self.facet_queryset = tours
+        if self.filters.get("country"):
+            tours = tours.filter(country=self.filters["country"])
+        if self.filters.get("sort") == "rating":
+            # Served by tour_rating_idx, or tour_country_rating_idx with a country selected.
+            self.keyset = ("-avg_rating", "id")
+        elif self.filters.get("q"):
+            self.keyset = ("-rank", "id")
+            tours = rank_tours(tours, self.filters["q"])
+        return tours
+
+    def last_modified(self) -> datetime.datetime | None:
+        if any(self.request.GET.get(name) for name in AVAILABILITY_FILTERS):
+            # Free seats change with every booking, which Tour.updated_at does not track.
+            return None
+        latest = Tour.objects.aggregate(latest=Max("updated_at"))["latest"]
+        deleted = catalog_deleted_at()
+        return max(latest, deleted) if latest else deleted
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        return self.get_catalog_context(ctx, country_facets(self.facet_queryset))
+
+    def get_catalog_context(self, ctx: dict, facets: list[dict]) -> dict:
+        ctx["search_form"] = self.search_form
+        ctx["selected_country"] = self.filters.get("country", "")
+        params = self.request.GET.copy()
+        params.pop("cursor", None)
+        params.pop("country", None)
+        ctx["all_countries_query"] = params.urlencode()
+        for facet in facets:
+            params["country"] = facet["country"]
+            facet["query"] = params.urlencode()
+        ctx["country_facets"] = facets
+        attach_card_versions(ctx["tours"])
+        ctx["card_cache_timeout"] = card_cache_timeout()
+        return ctx
 
 
-class TourDetailView(DetailView):
-    model = Tour
+class TourDetailView(ConditionalPageMixin, DetailView):
+    queryset = Tour.objects.without_blobs()
     template_name = "tours/tour_detail.html"
     context_object_name = "tour"
 
+    def last_modified(self) -> datetime.datetime | None:
+        latest_review = Review.objects.filter(tour=OuterRef("pk")).order_by("-updated_at").values("updated_at")[:1]
+        row = (
+            Tour.objects.filter(pk=self.kwargs["pk"])
+            .values_list("updated_at", Subquery(latest_review))
+            .first()
+        )
+        if row is None:
+            return None
+        return max(filter(None, row))
+
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx["reviews"] = Review.objects.filter(tour=self.object)
+        ctx["reviews"] = _review_page(self.object.pk, None)
         ctx["form"] = ReviewForm()
         return ctx
 
 
+REVIEWS_PAGE_SIZE = 10
+
+
+def review_paginator(tour_id: int) -> KeysetPaginator:
+    reviews = (
+        Review.objects.filter(tour_id=tour_id)
+        .select_related("author")
+        .only("tour_id", "tour_start", "tour_end", "text", "rating", "created_at", "author__username")
+    )
+    return KeysetPaginator(reviews, ("-created_at", "-id"), REVIEWS_PAGE_SIZE)
+
+
+def _review_page(tour_id: int, cursor: str | None):
+    return review_paginator(tour_id).page(cursor)
+
+
+def tour_reviews(request: HttpRequest, pk: int) -> HttpResponse:
+    page = _review_page(pk, request.GET.get("cursor"))
+    return render(request, "tours/_reviews.html", {"reviews": page, "tour_id": pk})
+
+
+IMAGE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+IMAGE_VARIANTS = ("original", *THUMBNAIL_SIZES)
+
+
+def _tour_image_etag(request: HttpRequest, pk: int, variant: str = "original") -> str | None:
+    image_hash = Tour.objects.filter(pk=pk).values_list("image_hash", flat=True).first()
+    return f'"{image_hash}-{variant}"' if image_hash else None
+
+
+@condition(etag_func=_tour_image_etag)
+def tour_image(request: HttpRequest, pk: int, variant: str = "original") -> HttpResponse:
+    if variant not in IMAGE_VARIANTS:
+        raise Http404
+    tour = get_object_or_404(Tour.objects.only("image_mime", "image_hash").exclude(image_hash=""), pk=pk)
+    path, mime = tour.image_file(variant)
+    if path is None:
+        raise Http404
+    if settings.TOUR_IMAGE_SENDFILE == "X-Accel-Redirect":
+        response = HttpResponse(content_type=mime)
+        response["X-Accel-Redirect"] = settings.TOUR_IMAGE_SENDFILE_URL + path.relative_to(image_root()).as_posix()
+    elif settings.TOUR_IMAGE_SENDFILE:
+        response = HttpResponse(content_type=mime)
+        response[settings.TOUR_IMAGE_SENDFILE] = str(path)
+    else:
+        response = FileResponse(path.open("rb"), content_type=mime)
+    if request.GET.get("v") == tour.image_hash[:16]:
+        patch_cache_control(response, public=True, max_age=IMAGE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
 def register(request: HttpRequest) -> HttpResponse:
     if request.method == "POST":
         form = UserRegistrationForm(request.POST)
@@ -42,40 +232,82 @@ def register(request: HttpRequest) -> HttpResponse:
     return render(request, "tours/register.html", {"form": form})
 
 
+SOLD_OUT_MESSAGE = "На выбранные даты не осталось мест."
+
+
 @login_required
 def reserve_tour(request: HttpRequest, pk: int) -> HttpResponse:
     tour = get_object_or_404(Tour, pk=pk)
     if request.method == "POST":
-        form = ReservationForm(request.POST)
+        form = ReservationForm(request.POST, tour=tour)
         if form.is_valid():
             reservation = form.save(commit=False)
             reservation.user = request.user
             reservation.tour = tour
-            reservation.save()
-            messages.success(request, "Заявка отправлена, ожидайте подтверждения администратора.")
-            return redirect("tours:my_reservations")
+            try:
+                with transaction.atomic():
+                    reservation.save()
+            except SoldOut:
+                form.add_error(None, SOLD_OUT_MESSAGE)
+            else:
+                messages.success(request, "Заявка отправлена, ожидайте подтверждения администратора.")
+                return redirect("tours:my_reservations")
     else:
-        form = ReservationForm(
-            initial={"travel_start": tour.start_date, "travel_end": tour.end_date}
-        )
+        form = ReservationForm(tour=tour)
     return render(request, "tours/reservation_form.html", {"form": form, "tour": tour})
 
 
+RESERVATION_LIST_FIELDS = ("guests", "travel_start", "travel_end", "status", "reserved_at", "tour__name")
+
+
+def reservation_paginator(user) -> KeysetPaginator:
+    reservations = Reservation.objects.filter(user=user).select_related("tour").only(*RESERVATION_LIST_FIELDS)
+    return KeysetPaginator(reservations, ("-reserved_at", "-id"))
+
+
 @login_required
 def my_reservations(request: HttpRequest) -> HttpResponse:
-    reservations = Reservation.objects.filter(user=request.user)
-    return render(request, "tours/reservations.html", {"reservations": reservations})
+    paginator = reservation_paginator(request.user)
+    page = paginator.page(request.GET.get(paginator.cursor_param), request.GET)
+    return render(request, "tours/reservations.html", {"reservations": page.object_list, "page": page})
+
+
+def reservation_events(request: HttpRequest) -> HttpResponse:
+    # The live stream needs the ASGI entry point (async_views.reservation_events); a WSGI worker
+    # cannot be held open, and 204 tells EventSource not to reconnect.
+    return HttpResponse(status=204)
+
+
+def archived_reservation_paginator(user) -> KeysetPaginator:
+    reservations = (
+        ArchivedReservation.objects.filter(user=user).select_related("tour").only(*RESERVATION_LIST_FIELDS)
+    )
+    return KeysetPaginator(reservations, ("-reserved_at", "-id"))
+
+
+@login_required
+def archived_reservations(request: HttpRequest) -> HttpResponse:
+    paginator = archived_reservation_paginator(request.user)
+    page = paginator.page(request.GET.get(paginator.cursor_param), request.GET)
+    return render(
+        request, "tours/reservations.html", {"reservations": page.object_list, "page": page, "archive": True}
+    )
 
 
 @login_required
 def reservation_update(request: HttpRequest, pk: int) -> HttpResponse:
-    reservation = get_object_or_404(Reservation, pk=pk, user=request.user)
+    reservation = get_object_or_404(Reservation.objects.with_tour(), pk=pk, user=request.user)
     if request.method == "POST":
         form = ReservationForm(request.POST, instance=reservation)
         if form.is_valid():
-            form.save()
-            messages.success(request, "Бронирование обновлено.")
-            return redirect("tours:my_reservations")
+            try:
+                with transaction.atomic():
+                    form.save()
+            except SoldOut:
+                form.add_error(None, SOLD_OUT_MESSAGE)
+            else:
+                messages.success(request, "Бронирование обновлено.")
+                return redirect("tours:my_reservations")
     else:
         form = ReservationForm(instance=reservation)
     return render(
@@ -87,9 +319,10 @@ def reservation_update(request: HttpRequest, pk: int) -> HttpResponse:
 
 @login_required
 def reservation_delete(request: HttpRequest, pk: int) -> HttpResponse:
-    reservation = get_object_or_404(Reservation, pk=pk, user=request.user)
+    reservation = get_object_or_404(Reservation.objects.with_tour(), pk=pk, user=request.user)
     if request.method == "POST":
-        reservation.delete()
+        with transaction.atomic():
+            reservation.delete()
         messages.info(request, "Бронирование удалено.")
         return redirect("tours:my_reservations")
     return render(request, "tours/reservation_confirm_delete.html", {"reservation": reservation})
@@ -109,15 +342,33 @@ def add_review(request: HttpRequest, pk: int) -> HttpResponse:
     return redirect("tours:detail", pk=pk)
 
 
-class SalesByCountryView(LoginRequiredMixin, ListView):
+class SalesReportMixin:
     template_name = "tours/sales.html"
     context_object_name = "totals"
-    login_url = reverse_lazy("tours:login")
 
     def get_queryset(self):
-        return Reservation.objects.filter(status=Reservation.CONFIRMED).values(
-            "tour__country"
-        ).annotate(total=Count("id")).order_by("tour__country")
+        self.filter_form = SalesFilterForm(self.request.GET or None)
+        summary = SalesSummary.objects.all()
+        if self.filter_form.is_valid():
+            if self.filter_form.cleaned_data["date_from"]:
+                summary = summary.filter(day__gte=self.filter_form.cleaned_data["date_from"])
+            if self.filter_form.cleaned_data["date_to"]:
+                summary = summary.filter(day__lte=self.filter_form.cleaned_data["date_to"])
+        return (
+            summary.values("country")
+            .annotate(total=Sum("confirmed_count"), guests=Sum("guests_total"))
+            .filter(total__gt=0)
+            .order_by("country")
+        )
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["filter_form"] = self.filter_form
+        return ctx
+
+
+class SalesByCountryView(LoginRequiredMixin, SalesReportMixin, ListView):
+    login_url = reverse_lazy("tours:login")
 
 
 @login_required